@@ -1,10 +1,12 @@
 import os
 import logging
-from bs4 import BeautifulSoup
+import metrics
 from urllib.parse import urljoin
-from utils import fetch_page, write_json, read_json, DATA_DIR, get_comic_id_from_url, upload_to_cloudinary
-from scraper import scrape_komiku_details
+from utils import fetch_page, update_index, DATA_DIR, get_comic_id_from_url, upload_to_cloudinary
+from scraper import scrape_komiku_details, make_soup
+from storage import read_comic, write_comic, update_summary, new_comic_layout, LAYOUT_SHARDED
 
+@metrics.labelled(lambda url: get_comic_id_from_url(url))
 def add_comic(url):
     logging.info(f"Mulai tambah komik: {url}")
     comic_id = get_comic_id_from_url(url)
@@ -12,21 +14,22 @@ def add_comic(url):
     index_file = os.path.join(DATA_DIR, "index.json")
 
     # Scrape metadata komik
-    html = fetch_page(url)
+    html = fetch_page(url, cache=True)
     if not html:
         logging.error(f"Gagal ambil halaman {url}")
-        return
+        return False
 
     try:
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = make_soup(html)
         title, author, synopsis, cover_url, _, genre, comic_type = scrape_komiku_details(url, soup)
 
         # Upload cover ke Cloudinary
         cover_cloudinary_url = upload_to_cloudinary(cover_url, comic_id, "cover") if cover_url and cover_url.startswith('http') else ""
 
         # Ambil data lama dari comic.json kalo ada
-        existing_comic_data = read_json(comic_file) or {}
+        existing_comic_data = read_comic(comic_id, with_images=False) or {}
         chapters = existing_comic_data.get("chapters", {})
+        layout = existing_comic_data.get("layout") if existing_comic_data else new_comic_layout()
         total_chapters = len(chapters)
 
         # Buat comic data
@@ -40,25 +43,28 @@ def add_comic(url):
             "chapters": chapters,
             "total_chapters": total_chapters
         }
+        if layout == LAYOUT_SHARDED:
+            comic_data["layout"] = LAYOUT_SHARDED
 
-        # Simpan ke <comic>.json (overwrite)
-        write_json(comic_file, comic_data)
+        # Simpan ke <comic>.json (overwrite), file chapter ga disentuh
+        write_comic(comic_id, comic_data, changed=[])
         logging.info(f"Berhasil disimpan (overwrite) ke {comic_file}")
 
         # Update index.json, jaga data lama
-        index_data = read_json(index_file) or {}
-        index_data[comic_id] = {
+        update_index(comic_id, {
             "title": title,
             "author": author,
             "synopsis": synopsis,
             "cover": cover_cloudinary_url,
             "genre": genre,
             "type": comic_type,
-            "total_chapters": total_chapters,
             "source_url": url
-        }
-        write_json(index_file, index_data)
+        }, create=True)
+        # Ringkasan lewat update_summary biar last_updated ga ke-reset tiap add ulang
+        update_summary(comic_id, comic_data)
         logging.info(f"Update {comic_id} di {index_file}")
+        return True
 
     except Exception as e:
-        logging.error(f"Error tambah komik {url}: {e}")
\ No newline at end of file
+        logging.error(f"Error tambah komik {url}: {e}")
+        return False
\ No newline at end of file
@@ -0,0 +1,306 @@
+"""Benchmark offline buat scrape, parse, JSON I/O, planning update-all dan ingest chapter.
+
+Semua jalan di direktori sementara (salinan data/ + config.ini dummy), HTTP dilayani
+server stub lokal dan upload Cloudinary diganti sink yang cuma baca byte-nya.
+
+    python benchmark.py                          # jalanin, tulis benchmark_results.json
+    python benchmark.py --output baseline.json   # simpen sebagai baseline
+    python benchmark.py --compare baseline.json  # bandingin, exit 1 kalo ada yang regresi
+    python benchmark.py --startup                # cek budget startup CLI, exit 1 kalo lewat
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = "benchmark_results.json"
+DEFAULT_THRESHOLD = 0.20
+LISTING_COMIC = "magic-emperor"
+BIG_COMICS = ["magic-emperor", "komik-one-piece-indo"]
+INGEST_PAGES = 40
+IMAGE_BYTES = 200 * 1024
+# `import main` (di luar waktu start interpreter) harus di bawah ini, dan modul berat
+# cuma boleh di-import sama command yang butuh
+STARTUP_BUDGET_MS = 120
+STARTUP_FORBIDDEN_MODULES = ("requests", "bs4", "cloudinary", "filelock", "PIL", "lxml", "urllib3")
+STARTUP_DIRS = ("data", "logs", "temp_images", "cache")
+
+DUMMY_CONFIG = """[Cloudinary]
+CloudName = bench
+ApiKey = bench
+ApiSecret = bench
+[GitHub]
+GitHubToken = bench
+GitHubRepo = bench/bench
+"""
+
+def listing_html(comic_id, chapter_keys):
+    """Halaman komik ala komiku: tabel chapter dari yang terbaru."""
+    rows = "".join(
+        f'<tr><td class="judulseries"><a href="/{comic_id}-chapter-{key}/"><span>Chapter {key}</span></a></td>'
+        f'<td class="tanggalseries">01/01/2025</td></tr>\n'
+        for key in reversed(chapter_keys)
+    )
+    return (
+        f"<html><head><title>{comic_id}</title>"
+        f'<meta property="og:image" content="https://thumbnail.komiku.org/{comic_id}.jpg"></head>'
+        f"<body><h1>Komik {comic_id}</h1>"
+        '<table class="inftable"><tr><td>Pengarang</td><td>Bench Author</td></tr>'
+        "<tr><td>Konsep Cerita</td><td>Fantasi</td></tr><tr><td>Jenis Komik</td><td>Manhua</td></tr></table>"
+        "<h2>Sinopsis Lengkap</h2><p>Sinopsis buat benchmark.</p>"
+        f'<table id="Daftar_Chapter">{rows}</table></body></html>'
+    )
+
+def chapter_html(base_url, comic_id, key, pages):
+    images = "".join(f'<img itemprop="image" src="{base_url}/img/{comic_id}/{key}/{page}.jpg">' for page in range(1, pages + 1))
+    return f'<html><body><h1>{comic_id} Chapter {key}</h1><div id="Baca_Komik">{images}</div></body></html>'
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    pages = {}
+    image = b""
+
+    def do_GET(self):
+        if self.path.startswith("/img/"):
+            # Tiap halaman beda isinya biar dedupe hash ga nyingkat upload
+            body, content_type = self.image + self.path.encode("utf-8"), "image/jpeg"
+        elif self.path in self.pages:
+            body, content_type = self.pages[self.path].encode("utf-8"), "text/html; charset=utf-8"
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return {
+        "min": round(min(samples), 6),
+        "median": round(statistics.median(samples), 6),
+        "mean": round(statistics.mean(samples), 6),
+        "runs": repeat,
+    }
+
+def setup_workspace():
+    workdir = tempfile.mkdtemp(prefix="greedy-bench-")
+    shutil.copytree(os.path.join(REPO_DIR, "data"), os.path.join(workdir, "data"),
+                    ignore=shutil.ignore_patterns("*.backup", "*.lock", "*.journal"))
+    shutil.copy(os.path.join(REPO_DIR, "debug.html"), workdir)
+    with open(os.path.join(workdir, "config.ini"), "w", encoding="utf-8") as f:
+        f.write(DUMMY_CONFIG)
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_DIR)
+    return workdir
+
+def start_stub_server(index_data):
+    StubHandler.image = os.urandom(IMAGE_BYTES)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    for comic_id in index_data:
+        with open(os.path.join("data", f"{comic_id}.json"), "r", encoding="utf-8") as f:
+            keys = list(json.load(f).get("chapters", {}))
+        StubHandler.pages[f"/manga/{comic_id}/"] = listing_html(comic_id, keys)
+        for key in keys[-2:]:
+            StubHandler.pages[f"/{comic_id}-chapter-{key}/"] = chapter_html(base_url, comic_id, key, INGEST_PAGES)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def run_benchmarks(repeat):
+    import http_cache
+    import http_client
+    import scraper
+    import utils
+    import cloudinary.uploader
+    from update_all import update_all
+    import update_all as update_all_module
+    from update_comic import update_comic
+
+    results = {}
+    index_file = os.path.join(utils.DATA_DIR, "index.json")
+    index_data = utils.read_json(index_file)
+    server = start_stub_server(index_data)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    http_client.HOST_RATE_LIMITS["127.0.0.1"] = (1e9, 1e9)
+    http_client.HOST_MAX_CONNECTIONS["127.0.0.1"] = 64
+    for comic_id in index_data:
+        index_data[comic_id]["source_url"] = f"{base_url}/manga/{comic_id}/"
+    utils.write_json(index_file, index_data)
+
+    # Scrape detail + daftar chapter dari fixture
+    with open("debug.html", "r", encoding="utf-8") as f:
+        debug_html = f.read()
+    listing = StubHandler.pages[f"/manga/{LISTING_COMIC}/"]
+    for parser in sorted({"html.parser", scraper.DEFAULT_PARSER}):
+        results[f"scrape_komiku_details[{parser}]"] = timed(
+            lambda: scraper.scrape_komiku_details("https://komiku.org/", scraper.make_soup(debug_html, parser=parser)), repeat)
+        results[f"scrape_chapter_list[{parser}]"] = timed(
+            lambda: scraper.scrape_chapter_list("https://komiku.org/", scraper.make_soup(listing, parser=parser)), repeat)
+    results["parse_chapter_list"] = timed(lambda: scraper.parse_chapter_list("https://komiku.org/", listing), repeat)
+
+    # JSON I/O di komik paling gede
+    for comic_id in BIG_COMICS:
+        comic_file = os.path.join(utils.DATA_DIR, f"{comic_id}.json")
+        data = utils.read_json(comic_file)
+        results[f"read_json[{comic_id}]"] = timed(lambda: utils.read_json(comic_file), repeat)
+        results[f"write_json[{comic_id}]"] = timed(lambda: utils.write_json(comic_file, data), repeat)
+
+    # Planning update-all: fetch + parse + tentuin chapter, update_comic diganti pencatat.
+    # Cold = cache HTTP kosong (parse semua halaman), warm = halaman dapet 304 dan di-skip
+    planned = []
+    real_update_comic = update_all_module.update_comic
+    update_all_module.update_comic = lambda url, start, end, *args, **kwargs: planned.append((url, start)) or True
+    def cold_planning():
+        shutil.rmtree(http_cache.HTTP_CACHE_DIR, ignore_errors=True)
+        update_all()
+    try:
+        results["update_all_planning[cold]"] = timed(cold_planning, repeat)
+        results["update_all_planning[warm]"] = timed(lambda: update_all(), repeat)
+    finally:
+        update_all_module.update_comic = real_update_comic
+
+    # Ingest satu chapter: download + upload ke sink, JSON write
+    uploaded = []
+    def upload_sink(fileobj, **kwargs):
+        uploaded.append(len(fileobj.read()))
+        return {"secure_url": f"https://res.cloudinary.com/bench/{kwargs.get('folder')}/{len(uploaded)}.jpg"}
+    cloudinary.uploader.upload = upload_sink
+    last_key = list(utils.read_json(os.path.join(utils.DATA_DIR, f"{LISTING_COMIC}.json"))["chapters"])[-1]
+    def ingest():
+        import image_cache
+        image_cache.reset()
+        update_comic(f"{base_url}/manga/{LISTING_COMIC}/", float(last_key), float(last_key), overwrite=True)
+    results[f"ingest_chapter[{INGEST_PAGES}_pages]"] = timed(ingest, max(1, repeat // 2))
+
+    server.shutdown()
+    return results
+
+def _python_ms(code, cwd):
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=cwd, check=True, capture_output=True)
+    return (time.perf_counter() - started) * 1000
+
+def check_startup(repeat):
+    """Cek startup CLI di direktori kosong (tanpa config.ini): waktu `import main` dikurangi
+    start interpreter, modul berat yang ikut ke-import, config yang kebaca pas import
+    (utils._settings harus masih None), dan `main.py help` ga boleh bikin direktori/gagal.
+    Balikin daftar pelanggaran."""
+    workdir = tempfile.mkdtemp(prefix="greedy-startup-")
+    problems = []
+    try:
+        prelude = f"import sys; sys.path.insert(0, {REPO_DIR!r}); "
+        baseline = statistics.median(_python_ms(prelude + "pass", workdir) for _ in range(repeat))
+        import_ms = statistics.median(_python_ms(prelude + "import main", workdir) for _ in range(repeat)) - baseline
+        print(f"  import main: {import_ms:.1f}ms (budget {STARTUP_BUDGET_MS}ms)")
+        if import_ms > STARTUP_BUDGET_MS:
+            problems.append(f"import main {import_ms:.1f}ms > {STARTUP_BUDGET_MS}ms")
+        settings_loaded, *loaded = subprocess.run(
+            [sys.executable, "-c", prelude + "import main, utils; print(utils._settings is not None, ' '.join(sorted(sys.modules)))"],
+            cwd=workdir, check=True, capture_output=True, text=True
+        ).stdout.split()
+        heavy = [name for name in STARTUP_FORBIDDEN_MODULES if name in loaded]
+        if heavy:
+            problems.append(f"import main ikut import {', '.join(heavy)}")
+        if settings_loaded == "True":
+            problems.append("import main udah baca config.ini (utils.settings() kepanggil pas import)")
+        result = subprocess.run([sys.executable, os.path.join(REPO_DIR, "main.py"), "help"], cwd=workdir, capture_output=True, text=True)
+        if result.returncode != 0:
+            problems.append(f"main.py help gagal tanpa config.ini: {result.stderr.strip().splitlines()[-1:]}")
+        created = [name for name in STARTUP_DIRS if os.path.exists(os.path.join(workdir, name))]
+        if created:
+            problems.append(f"main.py help bikin direktori {', '.join(created)}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return problems
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            print(f"  {name}: {current['median']:.4f}s (baru)")
+            continue
+        change = (current["median"] - previous["median"]) / previous["median"] if previous["median"] else 0.0
+        flag = "REGRESI" if change > threshold else ""
+        print(f"  {name}: {previous['median']:.4f}s -> {current['median']:.4f}s ({change:+.1%}) {flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline GreedyComicHub")
+    parser.add_argument("--repeat", type=int, default=5, help="Jumlah pengulangan per benchmark")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="File hasil (JSON)")
+    parser.add_argument("--compare", help="File baseline buat dibandingin")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Batas regresi median (0.2 = 20%%)")
+    parser.add_argument("--startup", action="store_true", help="Cuma cek budget startup CLI (exit 1 kalo lewat)")
+    args = parser.parse_args()
+    if args.startup:
+        problems = check_startup(args.repeat)
+        for problem in problems:
+            print(f"  GAGAL: {problem}")
+        sys.exit(1 if problems else 0)
+    output = os.path.abspath(args.output)
+    baseline_file = os.path.abspath(args.compare) if args.compare else None
+
+    logging.basicConfig(level=logging.ERROR)
+    workdir = setup_workspace()
+    try:
+        results = run_benchmarks(args.repeat)
+        # Cache yang biasanya disimpen waktu exit ditulis sekarang, selagi masih di workspace
+        import selector_cache
+        selector_cache.save()
+    finally:
+        os.chdir(REPO_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    print(f"Hasil disimpen ke {output}")
+    if baseline_file:
+        with open(baseline_file, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark regresi lebih dari {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+    else:
+        for name, result in sorted(results.items()):
+            print(f"  {name}: median {result['median']:.4f}s, min {result['min']:.4f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+import threading
+
+class ChapterBudget:
+    """Jatah kerja buat satu run (chapter, tugas queue, ...), dibagi antar thread.
+
+    take(n) ngasih paling banyak n dari sisa jatah, refund(n) balikin yang ga kepake.
+    """
+
+    def __init__(self, total):
+        self.remaining = total
+        self.lock = threading.Lock()
+
+    def take(self, wanted):
+        with self.lock:
+            granted = min(wanted, self.remaining)
+            self.remaining -= granted
+            return granted
+
+    def refund(self, count):
+        with self.lock:
+            self.remaining += count
@@ -0,0 +1,124 @@
+import bisect
+import math
+import re
+
+# Nomor chapter kanonik: int kalo bulat (1), float kalo desimal (302.5).
+# Key di JSON selalu str() dari nomor kanonik, jadi "1.0"/"1.00" jadi "1".
+# Angka di teks cuma diambil kalo nempel ke "chapter"/"ch."/"bab", jadi "Season 2 Chapter 5" = 5
+# dan "Vol.3 Ch.12" = 12. Teks tanpa penanda itu ga ditebak.
+CHAPTER_NUMBER_RE = re.compile(r"\b(?:chapter|ch\.?|bab)\s*(\d+(?:\.\d+)?)", re.IGNORECASE)
+
+def chapter_number(value):
+    """Ubah "1", "1.0", 1.0, "Chapter 12.5", "Vol.3 Ch.12" dll jadi nomor kanonik.
+
+    Raise ValueError kalo ga bisa, caller-nya ngelewatin baris itu.
+    """
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        text = str(value).strip()
+        try:
+            number = float(text)
+        except ValueError:
+            match = CHAPTER_NUMBER_RE.search(text)
+            if not match:
+                raise ValueError(f"Bukan nomor chapter: {value!r}")
+            number = float(match.group(1))
+    return int(number) if number.is_integer() else number
+
+def chapter_key(value):
+    return str(chapter_number(value))
+
+class ChapterIndex:
+    """Daftar chapter satu komik, urut berdasarkan nomor.
+
+    Nyimpen key asli dari JSON biar data lama ("69.0") tetap ketemu walau belum dinormalisasi.
+    """
+
+    def __init__(self, keys=()):
+        pairs = {}
+        for key in keys:
+            try:
+                pairs.setdefault(float(chapter_number(key)), key)
+            except ValueError:
+                continue
+        self.numbers = sorted(pairs)
+        self.keys = [pairs[number] for number in self.numbers]
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def __contains__(self, value):
+        return self.get_key(value) is not None
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def add(self, value, key=None):
+        number = float(chapter_number(value))
+        position = bisect.bisect_left(self.numbers, number)
+        if position < len(self.numbers) and self.numbers[position] == number:
+            return
+        self.numbers.insert(position, number)
+        self.keys.insert(position, key or chapter_key(number))
+
+    def get_key(self, value):
+        """Key yang kesimpen buat nomor ini, None kalo ga ada."""
+        number = float(chapter_number(value))
+        position = bisect.bisect_left(self.numbers, number)
+        if position < len(self.numbers) and self.numbers[position] == number:
+            return self.keys[position]
+        return None
+
+    def latest(self):
+        return chapter_number(self.numbers[-1]) if self.numbers else None
+
+    def range(self, start, end):
+        """Key chapter dengan start <= nomor <= end, urut."""
+        low = bisect.bisect_left(self.numbers, float(start))
+        high = bisect.bisect_right(self.numbers, float(end))
+        return self.keys[low:high]
+
+    def next_after(self, value):
+        """Nomor chapter pertama yang lebih gede dari value, None kalo ga ada."""
+        position = bisect.bisect_right(self.numbers, float(value))
+        return chapter_number(self.numbers[position]) if position < len(self.numbers) else None
+
+    def missing_from(self, other):
+        """Nomor chapter di index lain (misal hasil scrape) yang ga ada di sini, urut."""
+        return [chapter_number(number) for number in other.numbers if number not in self]
+
+    def gaps(self):
+        """Nomor bulat yang bolong di antara chapter pertama dan terakhir."""
+        missing = []
+        for low, high in zip(self.numbers, self.numbers[1:]):
+            missing.extend(range(int(low) + 1, math.ceil(high)))
+        return [number for number in missing if number not in self]
+
+def normalize_chapters(chapters):
+    """Normalisasi key dict chapter. Key dobel ("69" dan "69.0") digabung, yang gambarnya
+    lebih lengkap yang dipake. Balikin (chapters baru urut nomor, jumlah key yang berubah)."""
+    merged = {}
+    renamed = 0
+    for key, chapter in chapters.items():
+        try:
+            new_key = chapter_key(key)
+        except ValueError:
+            new_key = key
+        if new_key != key:
+            renamed += 1
+        current = merged.get(new_key)
+        if current is None or _image_count(chapter) > _image_count(current):
+            merged[new_key] = chapter
+    ordered = dict(sorted(merged.items(), key=lambda item: _sort_number(item[0])))
+    return ordered, renamed
+
+def _image_count(chapter):
+    images = chapter.get("images") or chapter.get("pages") or []
+    return (sum(1 for image in images if "cloudinary.com" in image), len(images), chapter.get("total_pages", 0))
+
+def _sort_number(key):
+    try:
+        return float(chapter_number(key))
+    except ValueError:
+        return float("inf")
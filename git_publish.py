@@ -0,0 +1,142 @@
+import base64
+import json
+import logging
+import os
+import subprocess
+import time
+
+# Publish data ke repo GitHub: cuma file di PUBLISH_PATHS yang berubah yang di-stage
+# (bukan `git add .`), update yang datang berdekatan digabung jadi satu commit per
+# PUSH_WINDOW detik, dan push dilewati kalo HEAD udah sama dengan yang terakhir di-push.
+# Token ga pernah masuk URL/argumen proses; dikirim lewat header di environment git.
+PUBLISH_PATHS = ("data", os.path.join("public", "data"))
+# .gz/.br dari publish.py ga dipake GitHub Pages, cuma bikin commit gede
+SKIP_SUFFIXES = (".lock", ".tmp", ".backup", ".journal", ".gz", ".br")
+# .publish.json isinya mtime lokal, bukan buat frontend
+SKIP_FILES = ("queue.json", ".publish.json")
+STATE_FILE = os.path.join("cache", "git_publish.json")
+DEFAULT_PUSH_WINDOW = 15 * 60
+DEFAULT_BRANCH = "main"
+COMMIT_MESSAGE = "Update comic data"
+MAX_COMICS_IN_MESSAGE = 10
+
+def _git(*args, env=None, input=None, check=True):
+    return subprocess.run(["git", *args], capture_output=True, text=True, env=env, input=input, check=check)
+
+def load_state():
+    try:
+        with open(STATE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+    temp_path = STATE_FILE + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=4)
+    os.replace(temp_path, STATE_FILE)
+
+def _publishable(path):
+    name = os.path.basename(path)
+    return name not in SKIP_FILES and not name.endswith(SKIP_SUFFIXES) and ".tmp" not in name
+
+def changed_files(paths=PUBLISH_PATHS):
+    """File di bawah `paths` yang beda dari HEAD (diubah, baru, atau dihapus)."""
+    existing = [path for path in paths if os.path.exists(path)] or list(paths)
+    output = _git("status", "--porcelain=v1", "-z", "--untracked-files=all", "--", *existing).stdout
+    entries = output.split("\0")
+    files = []
+    i = 0
+    while i < len(entries):
+        entry = entries[i]
+        i += 1
+        if len(entry) < 4:
+            continue
+        status, path = entry[:2], entry[3:]
+        if "R" in status or "C" in status:
+            # Rename: path lama ada di entry berikutnya, dua-duanya perlu di-stage
+            files.append(entries[i])
+            i += 1
+        files.append(path)
+    return sorted({path for path in files if _publishable(path)})
+
+def stage(files):
+    """git add cuma buat file ini (termasuk yang dihapus), lewat stdin biar ga kena batas panjang argumen."""
+    if files:
+        _git("add", "--all", "--pathspec-from-file=-", "--pathspec-file-nul", input="\0".join(files))
+
+def _comic_ids(files):
+    ids = set()
+    for path in files:
+        parts = path.replace(os.sep, "/").split("/")
+        if parts[0] == "public":
+            parts = parts[1:]
+        if len(parts) > 2:
+            ids.add(parts[1])
+        elif len(parts) == 2 and not parts[1].startswith(".") and not parts[1].startswith("index.json"):
+            ids.add(parts[1].split(".json")[0])
+    return sorted(ids)
+
+def commit_message(files):
+    comics = _comic_ids(files)
+    if not comics:
+        return COMMIT_MESSAGE
+    listed = ", ".join(comics[:MAX_COMICS_IN_MESSAGE])
+    more = f" +{len(comics) - MAX_COMICS_IN_MESSAGE} lagi" if len(comics) > MAX_COMICS_IN_MESSAGE else ""
+    return f"{COMMIT_MESSAGE}: {listed}{more}"
+
+def remote_and_env(remote, token):
+    """URL remote + environment git. Remote GitHub pake header Authorization dari env
+    (GIT_CONFIG_*), bukan token di URL; remote lokal (path / file://) dipake apa adanya."""
+    env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+    if remote.startswith("https://") and token:
+        host = remote.split("/", 3)[2]
+        credentials = base64.b64encode(f"x-access-token:{token}".encode("utf-8")).decode("ascii")
+        env.update({
+            "GIT_CONFIG_COUNT": "1",
+            "GIT_CONFIG_KEY_0": f"http.https://{host}/.extraheader",
+            "GIT_CONFIG_VALUE_0": f"AUTHORIZATION: basic {credentials}",
+        })
+    return remote, env
+
+def publish_changes(remote, token=None, branch=DEFAULT_BRANCH, window=DEFAULT_PUSH_WINDOW, now=False):
+    """Commit + push perubahan data. Balikin True kalo beres (termasuk kalo ditunda/ga ada perubahan).
+
+    Selama belum lewat `window` detik dari commit terakhir, perubahan dibiarin numpuk di
+    working tree (now=True buat maksa). Push cuma jalan kalo HEAD beda dari push terakhir.
+    """
+    state = load_state()
+    files = changed_files()
+    head = _git("rev-parse", "HEAD", check=False).stdout.strip()
+    if not files and head == state.get("last_pushed"):
+        logging.info("Tidak ada perubahan. Skip push.")
+        return True
+    if files:
+        waited = time.time() - state.get("last_commit_at", 0)
+        if not now and waited < window:
+            logging.info(f"{len(files)} file berubah, commit ditunda {window - waited:.0f}s lagi biar digabung (pake --now buat maksa)")
+            return True
+        stage(files)
+        if _git("diff", "--cached", "--quiet", check=False).returncode != 0:
+            _git("commit", "-m", commit_message(files))
+            state["last_commit_at"] = time.time()
+            head = _git("rev-parse", "HEAD").stdout.strip()
+            logging.info(f"Commit {head[:8]}: {len(files)} file")
+        else:
+            logging.info("File berubah tapi isinya sama dengan HEAD, ga ada yang di-commit")
+    if head and head != state.get("last_pushed"):
+        remote, env = remote_and_env(remote, token)
+        # Satu ref aja yang di-push; git ngirim delta dari commit yang udah ada di remote
+        result = _git("push", "--no-tags", remote, f"HEAD:refs/heads/{branch}", env=env, check=False)
+        if result.returncode != 0:
+            save_state(state)
+            # stderr bisa ngandung URL remote, tapi token ga pernah ada di situ
+            logging.error(f"Push gagal: {result.stderr.strip()}")
+            return False
+        state["last_pushed"] = head
+        logging.info(f"Berhasil push {head[:8]} ke {branch}.")
+    else:
+        logging.info("HEAD udah di-push sebelumnya, skip push.")
+    save_state(state)
+    return True
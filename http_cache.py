@@ -0,0 +1,140 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import http_client
+
+# Cache halaman HTML di disk buat conditional GET (ETag / Last-Modified).
+# Tiap URL satu file: validator, hash body, body-nya, dan hash body terakhir yang
+# udah diproses tuntas per mode (seen) biar caller bisa skip parsing kalo ga berubah.
+HTTP_CACHE_DIR = os.path.join("cache", "http")
+HTTP_CACHE_TTL = 7 * 24 * 3600
+HTTP_CACHE_MAX_BYTES = 50 * 1024 * 1024
+EVICT_EVERY = 20
+
+_lock = threading.Lock()
+_stats = {"not_modified": 0, "unchanged": 0, "changed": 0}
+_saves = 0
+
+def _entry_path(url):
+    return os.path.join(HTTP_CACHE_DIR, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+def _load_entry(url):
+    path = _entry_path(url)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get("url") != url or time.time() - entry.get("checked_at", 0) > HTTP_CACHE_TTL:
+        return None
+    return entry
+
+def _save_entry(entry):
+    global _saves
+    os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+    path = _entry_path(entry["url"])
+    temp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+    os.replace(temp_path, path)
+    with _lock:
+        _saves += 1
+        due = _saves % EVICT_EVERY == 0
+    if due:
+        evict()
+
+def evict():
+    """Buang entry yang lewat TTL, lalu yang paling lama ga dicek sampe di bawah HTTP_CACHE_MAX_BYTES."""
+    if not os.path.isdir(HTTP_CACHE_DIR):
+        return 0
+    now = time.time()
+    files = []
+    for name in os.listdir(HTTP_CACHE_DIR):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(HTTP_CACHE_DIR, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    files.sort()
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for mtime, size, path in files:
+        if now - mtime <= HTTP_CACHE_TTL and total <= HTTP_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    if removed:
+        logging.info(f"Cache HTTP: {removed} entry dibuang")
+    return removed
+
+def fetch(url, retries=3, backoff=2):
+    """GET dengan If-None-Match / If-Modified-Since. Balikin body (str).
+
+    Raise requests.RequestException kalo gagal, sama kayak http_client.get.
+    """
+    entry = _load_entry(url)
+    headers = dict(http_client.HEADERS)
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    response = http_client.get(url, headers=headers, retries=retries, backoff=backoff)
+    if response.status_code == 304 and entry:
+        with _lock:
+            _stats["not_modified"] += 1
+        entry["checked_at"] = time.time()
+        _save_entry(entry)
+        return entry["body"]
+    body = response.text
+    body_hash = hashlib.sha256(body.encode("utf-8")).hexdigest()
+    with _lock:
+        _stats["unchanged" if entry and entry.get("body_hash") == body_hash else "changed"] += 1
+    _save_entry({
+        "url": url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "body_hash": body_hash,
+        "seen": entry.get("seen", {}) if entry else {},
+        "checked_at": time.time(),
+        "body": body,
+    })
+    return body
+
+def cached_body(url):
+    """Body terakhir yang kesimpen buat URL ini tanpa request baru, None kalo ga ada."""
+    entry = _load_entry(url)
+    return entry.get("body") if entry else None
+
+def is_unchanged(url, tag="default"):
+    """True kalo body terakhir sama persis dengan yang udah ditandai mark_seen() buat tag ini."""
+    entry = _load_entry(url)
+    seen_hash = (entry or {}).get("seen", {}).get(tag)
+    return bool(seen_hash and seen_hash == entry.get("body_hash"))
+
+def mark_seen(url, tag="default"):
+    """Tandai body terakhir udah diproses tuntas (ga ada kerjaan tersisa dari halaman ini).
+
+    tag misahin arti "tuntas" antar mode, misal update biasa vs catch-up.
+    """
+    entry = _load_entry(url)
+    if entry:
+        entry.setdefault("seen", {})[tag] = entry.get("body_hash")
+        _save_entry(entry)
+
+def stats():
+    with _lock:
+        result = dict(_stats)
+    requests_made = sum(result.values())
+    result["hit_rate"] = round((result["not_modified"] + result["unchanged"]) / requests_made, 3) if requests_made else 0.0
+    return result
@@ -0,0 +1,178 @@
+import email.utils
+import logging
+import metrics
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Referer": "https://komiku.org/"
+}
+IMAGE_HEADERS = {
+    "User-Agent": HEADERS["User-Agent"],
+    "Accept": "image/avif,image/webp,image/*,*/*;q=0.8",
+    "Referer": "https://komiku.org/"
+}
+
+# Limit per host: (request per detik, burst). Host yang ga ada di sini pake DEFAULT_RATE_LIMIT.
+HOST_RATE_LIMITS = {
+    "komiku.org": (2.0, 4),
+    "img.komiku.org": (8.0, 16),
+}
+DEFAULT_RATE_LIMIT = (4.0, 8)
+# Maksimal request yang lagi jalan bareng ke satu host
+HOST_MAX_CONNECTIONS = {
+    "komiku.org": 2,
+    "img.komiku.org": 8,
+}
+DEFAULT_MAX_CONNECTIONS = 4
+POOL_MAXSIZE = 16
+RETRY_STATUS = {429, 500, 502, 503, 504}
+MAX_BACKOFF = 60
+
+_sessions = {}
+_buckets = {}
+_slots = {}
+_lock = threading.Lock()
+
+class TokenBucket:
+    """Token bucket sederhana, thread-safe. acquire() nunggu sampe ada token."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def _host(url):
+    return urlparse(url).hostname or ""
+
+def get_session(host):
+    """Session keep-alive per host, dibagi antar thread."""
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[host] = session
+        return session
+
+def get_bucket(host):
+    with _lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            rate, capacity = HOST_RATE_LIMITS.get(host, DEFAULT_RATE_LIMIT)
+            bucket = TokenBucket(rate, capacity)
+            _buckets[host] = bucket
+        return bucket
+
+def get_slots(host):
+    with _lock:
+        slots = _slots.get(host)
+        if slots is None:
+            slots = threading.BoundedSemaphore(HOST_MAX_CONNECTIONS.get(host, DEFAULT_MAX_CONNECTIONS))
+            _slots[host] = slots
+        return slots
+
+def _retry_after(response):
+    """Baca header Retry-After (detik atau tanggal HTTP), None kalo ga ada."""
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+def backoff_delay(attempt, base=1.0):
+    """Exponential backoff dengan full jitter."""
+    return random.uniform(0, min(MAX_BACKOFF, base * (2 ** attempt)))
+
+def _release_on_close(response, slots):
+    """Slot host baru dilepas pas response ditutup, jadi body stream=True ikut kehitung."""
+    close = response.close
+    released = False
+    def close_and_release():
+        nonlocal released
+        try:
+            close()
+        finally:
+            if not released:
+                released = True
+                slots.release()
+    response.close = close_and_release
+
+def get(url, headers=None, timeout=10, retries=3, backoff=1.0, **kwargs):
+    """GET lewat session pool + rate limit per host, retry dengan backoff.
+
+    Balikin response yang sukses, raise requests.RequestException kalo semua percobaan gagal.
+    Kalo stream=True, slot koneksi host dipegang sampe response.close() dipanggil.
+    """
+    host = _host(url)
+    session = get_session(host)
+    bucket = get_bucket(host)
+    slots = get_slots(host)
+    stream = kwargs.get("stream", False)
+    for attempt in range(retries):
+        bucket.acquire()
+        response = None
+        slots.acquire()
+        try:
+            response = session.get(url, headers=headers or HEADERS, timeout=timeout, **kwargs)
+            if response.status_code in RETRY_STATUS:
+                raise requests.HTTPError(f"{response.status_code} dari {host}", response=response)
+        except requests.RequestException as e:
+            if response is not None:
+                response.close()
+            slots.release()
+            if attempt == retries - 1:
+                raise
+            delay = _retry_after(response)
+            if delay is None:
+                delay = backoff_delay(attempt, backoff)
+            elif delay > MAX_BACKOFF:
+                # Server minta nunggu lebih lama dari batas, nyerah aja daripada nembak kecepetan
+                logging.warning(f"Gagal ambil {url}: server minta tunggu {delay:.0f}s (> {MAX_BACKOFF}s), nyerah")
+                raise
+            metrics.inc_retry("http")
+            logging.warning(f"Gagal ambil {url} (percobaan {attempt + 1}/{retries}): {e}. Coba lagi dalam {delay:.1f}s")
+            time.sleep(delay)
+            continue
+        except BaseException:
+            slots.release()
+            raise
+        if stream:
+            _release_on_close(response, slots)
+        else:
+            slots.release()
+        # Error 4xx lain (404 dll) ga bakal beres kalo diulang
+        try:
+            response.raise_for_status()
+        except requests.HTTPError:
+            response.close()
+            raise
+        return response
@@ -0,0 +1,248 @@
+import atexit
+import glob
+import hashlib
+import json
+import logging
+import os
+import threading
+
+# Index lokal: URL sumber / hash isi gambar -> secure_url Cloudinary yang udah ada,
+# plus meta (ukuran + URL varian) buat gambar yang lewat image_optimize
+CACHE_DIR = "cache"
+IMAGE_CACHE_FILE = os.path.join(CACHE_DIR, "image_cache.json")
+# Checkpoint: tiap upload yang selesai langsung ditambahin (append + fsync) ke sini,
+# jadi run yang mati di tengah chapter ga upload ulang halaman yang udah beres.
+# Dilebur ke IMAGE_CACHE_FILE sekali pas proses selesai (atexit), atau lebih awal
+# kalo checkpoint-nya udah lewat CHECKPOINT_COMPACT_BYTES (daemon yang jalan lama).
+CHECKPOINT_FILE = os.path.join(CACHE_DIR, "upload_checkpoint.jsonl")
+CHECKPOINT_COMPACT_BYTES = 4 * 1024 * 1024
+# Daemon, worker queue dan update-all bisa jalan barengan: append checkpoint dan
+# save() (replay + tulis snapshot + hapus checkpoint) dipegang di bawah lock file ini
+CACHE_LOCK_FILE = IMAGE_CACHE_FILE + ".lock"
+HASH_CHUNK_SIZE = 64 * 1024
+
+_lock = threading.Lock()
+_cache = None
+_dirty = False
+_stats = {"url_hits": 0, "hash_hits": 0, "misses": 0}
+
+def _file_lock():
+    from filelock import FileLock
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return FileLock(CACHE_LOCK_FILE)
+
+def _read_snapshot(cache):
+    """Gabungin IMAGE_CACHE_FILE ke cache."""
+    if not os.path.exists(IMAGE_CACHE_FILE):
+        return
+    try:
+        with open(IMAGE_CACHE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        cache["urls"].update(data.get("urls", {}))
+        cache["hashes"].update(data.get("hashes", {}))
+        cache["meta"].update(data.get("meta", {}))
+    except (OSError, ValueError) as e:
+        logging.warning(f"Cache gambar {IMAGE_CACHE_FILE} rusak, mulai dari kosong: {e}")
+
+def _load():
+    global _cache, _dirty
+    if _cache is None:
+        _cache = {"urls": {}, "hashes": {}, "meta": {}}
+        _read_snapshot(_cache)
+        replayed = _replay_checkpoint(_cache)
+        if replayed:
+            _dirty = True
+            logging.info(f"Lanjutin dari checkpoint: {replayed} gambar yang udah diupload")
+    return _cache
+
+def _replay_checkpoint(cache):
+    """Masukin entry dari CHECKPOINT_FILE ke cache. Baris yang kepotong (crash pas nulis) dilewati."""
+    if not os.path.exists(CHECKPOINT_FILE):
+        return 0
+    replayed = 0
+    with open(CHECKPOINT_FILE, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("source"):
+                cache["urls"][entry["source"]] = entry["url"]
+            if entry.get("digest"):
+                cache["hashes"][entry["digest"]] = entry["url"]
+            if entry.get("meta"):
+                cache["meta"][entry["url"]] = entry["meta"]
+            replayed += 1
+    return replayed
+
+def _append_checkpoint(entry):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(CHECKPOINT_FILE, "ab+") as f:
+        # Sisa baris kepotong dari crash sebelumnya ditutup dulu biar entry ini ga ikut rusak
+        if f.seek(0, os.SEEK_END):
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+        f.write((json.dumps(entry) + "\n").encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+
+def content_hash(fileobj):
+    """SHA-256 dari isi file-like, posisi dibalikin ke awal."""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+def lookup_url(source_url):
+    with _lock:
+        secure_url = _load()["urls"].get(source_url)
+        if secure_url:
+            _stats["url_hits"] += 1
+        return secure_url
+
+def lookup_hash(digest):
+    with _lock:
+        secure_url = _load()["hashes"].get(digest)
+        if secure_url:
+            _stats["hash_hits"] += 1
+        else:
+            _stats["misses"] += 1
+        return secure_url
+
+def lookup_meta(secure_url):
+    """{"width", "height", "variants": {lebar: url}} buat gambar hasil optimasi, None kalo ga ada."""
+    with _lock:
+        return _load()["meta"].get(secure_url)
+
+def record(secure_url, source_url=None, digest=None, meta=None):
+    """Catat hasil upload; langsung masuk checkpoint di disk sebelum fungsi ini balik."""
+    global _dirty
+    with _lock:
+        cache = _load()
+        if source_url:
+            cache["urls"][source_url] = secure_url
+        if digest:
+            cache["hashes"][digest] = secure_url
+        entry = {"source": source_url, "url": secure_url, "digest": digest}
+        if meta:
+            cache["meta"][secure_url] = meta
+            entry["meta"] = meta
+        with _file_lock():
+            _append_checkpoint(entry)
+            compact = os.path.getsize(CHECKPOINT_FILE) >= CHECKPOINT_COMPACT_BYTES
+        _dirty = True
+    if compact:
+        save()
+
+def save(merge=True):
+    """Tulis cache ke disk (atomic) kalo ada perubahan.
+
+    Snapshot di disk (bisa aja udah ditulis proses lain) digabung dulu, kecuali merge=False
+    (prune, entry yang dibuang jangan balik lagi). Checkpoint selalu ikut digabung.
+    """
+    global _cache, _dirty
+    with _lock:
+        if not _dirty or _cache is None:
+            return
+        with _file_lock():
+            if merge:
+                merged = {"urls": {}, "hashes": {}, "meta": {}}
+                _read_snapshot(merged)
+                for table in merged:
+                    merged[table].update(_cache[table])
+                _cache = merged
+            # Ambil juga checkpoint dari proses lain yang belum sempet save
+            _replay_checkpoint(_cache)
+            temp_path = f"{IMAGE_CACHE_FILE}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(_cache, f)
+            os.replace(temp_path, IMAGE_CACHE_FILE)
+            # Semua isi checkpoint udah ada di snapshot
+            if os.path.exists(CHECKPOINT_FILE):
+                os.remove(CHECKPOINT_FILE)
+        _dirty = False
+
+atexit.register(save)
+
+def stats():
+    with _lock:
+        cache = _load()
+        return dict(_stats, urls=len(cache["urls"]), hashes=len(cache["hashes"]), optimized=len(cache["meta"]))
+
+def reset():
+    """Kosongin cache di memori (file di disk ga dibaca), misal buat benchmark yang butuh start dingin."""
+    global _cache, _dirty
+    with _lock:
+        _cache = {"urls": {}, "hashes": {}, "meta": {}}
+        _dirty = False
+        for key in _stats:
+            _stats[key] = 0
+
+def _iter_image_urls(comic_data):
+    """URL gambar dari file komik, manifest, atau file chapter (layout sharded)."""
+    if comic_data.get("cover"):
+        yield comic_data["cover"]
+    chapters = comic_data.get("chapters", {}).values() if "chapters" in comic_data else [comic_data]
+    for chapter in chapters:
+        for image_url in chapter.get("images", []) + chapter.get("pages", []):
+            yield image_url
+
+def _prune(data_dir):
+    """Buang entry yang secure_url-nya udah ga dipake di data komik, balikin set URL Cloudinary yang dipake."""
+    global _cache, _dirty
+    # Checkpoint dilebur dulu biar ga muncul lagi setelah entry-nya dibuang
+    with _lock:
+        _load()
+    save()
+    referenced = set()
+    comic_files = glob.glob(os.path.join(data_dir, "*.json")) + glob.glob(os.path.join(data_dir, "*", "*.json"))
+    for comic_file in sorted(comic_files):
+        if os.path.basename(comic_file) in ("index.json", "queue.json"):
+            continue
+        try:
+            with open(comic_file, "r", encoding="utf-8") as f:
+                comic_data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Lewati {comic_file}: {e}")
+            continue
+        if isinstance(comic_data, dict):
+            referenced.update(url for url in _iter_image_urls(comic_data) if "cloudinary.com" in url)
+    with _lock:
+        old = _load()
+        _cache = {
+            "urls": {src: dst for src, dst in old["urls"].items() if dst in referenced},
+            "hashes": {digest: dst for digest, dst in old["hashes"].items() if dst in referenced},
+            "meta": {dst: meta for dst, meta in old["meta"].items() if dst in referenced},
+        }
+        _dirty = True
+    return referenced
+
+def prune(data_dir):
+    """Buang entry cache yang gambarnya udah ga dipake di data/*.json (tanpa download)."""
+    referenced = _prune(data_dir)
+    save(merge=False)
+    logging.info(f"Cache gambar di-prune dari {data_dir}: {len(referenced)} gambar Cloudinary, {stats()}")
+    return stats()
+
+def rebuild(data_dir, fetch):
+    """Bangun ulang tabel hash dari gambar yang udah diupload: prune, lalu download dan hash
+    gambar Cloudinary yang belum punya hash pake fetch (fungsi url -> file-like).
+
+    URL sumber asli ga disimpen di data komik, jadi cuma tabel hash yang bisa diisi ulang;
+    halaman baru dengan isi sama nanti dipake ulang lewat hash-nya.
+    """
+    referenced = _prune(data_dir)
+    with _lock:
+        hashed = set(_cache["hashes"].values())
+    for image_url in sorted(referenced - hashed):
+        try:
+            with fetch(image_url) as buffer:
+                record(image_url, digest=content_hash(buffer))
+        except Exception as e:
+            logging.warning(f"Gagal hash {image_url}: {e}")
+    save(merge=False)
+    logging.info(f"Cache gambar dibangun ulang dari {data_dir}: {len(referenced)} gambar Cloudinary, {stats()}")
+    return stats()
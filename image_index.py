@@ -0,0 +1,145 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+# Reverse index: URL gambar/cover -> (komik, chapter, halaman), plus host-nya.
+# Diupdate tiap storage.write_comic nulis, jadi query "chapter mana yang masih pake
+# img.komiku.org" ga perlu grep semua JSON. Bisa dibangun ulang kapan aja dari data/.
+IMAGE_INDEX_FILE = os.path.join("cache", "image_index.db")
+IMAGE_KEYS = ("images", "pages")
+CLOUDINARY_HOST = "res.cloudinary.com"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    url TEXT NOT NULL,
+    host TEXT NOT NULL,
+    comic TEXT NOT NULL,
+    chapter TEXT,
+    page INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS images_url ON images(url);
+CREATE INDEX IF NOT EXISTS images_host ON images(host);
+CREATE INDEX IF NOT EXISTS images_location ON images(comic, chapter);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+_local = threading.local()
+
+def _connect():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(IMAGE_INDEX_FILE), exist_ok=True)
+        conn = sqlite3.connect(IMAGE_INDEX_FILE, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        _local.conn = conn
+    return conn
+
+def _host(url):
+    return (urlparse(url).hostname or "").lower()
+
+def _chapter_rows(comic_id, key, chapter):
+    for image_key in IMAGE_KEYS:
+        for page, url in enumerate(chapter.get(image_key, []), start=1):
+            if url:
+                yield (url, _host(url), comic_id, key, page)
+
+def index_comic(comic_id, comic_data, changed=None, removed=()):
+    """Update index buat satu komik. changed=None = semua chapter diindex ulang, selain itu
+    cuma chapter di `changed` (record lengkapnya harus ada di comic_data) + cover."""
+    chapters = comic_data.get("chapters", {})
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if changed is None:
+            conn.execute("DELETE FROM images WHERE comic = ?", (comic_id,))
+            keys = list(chapters)
+        else:
+            keys = [key for key in changed if key in chapters]
+            conn.execute("DELETE FROM images WHERE comic = ? AND chapter IS NULL", (comic_id,))
+            stale = list(keys) + list(removed)
+            conn.executemany("DELETE FROM images WHERE comic = ? AND chapter = ?", [(comic_id, key) for key in stale])
+        cover = comic_data.get("cover")
+        if cover:
+            conn.execute("INSERT INTO images VALUES (?, ?, ?, NULL, 0)", (cover, _host(cover), comic_id))
+        for key in keys:
+            conn.executemany("INSERT INTO images VALUES (?, ?, ?, ?, ?)", _chapter_rows(comic_id, key, chapters[key]))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def safe_index_comic(comic_id, comic_data, changed=None, removed=()):
+    """index_comic yang ga bikin write data gagal; index bisa dibangun ulang belakangan."""
+    try:
+        index_comic(comic_id, comic_data, changed, removed)
+    except (sqlite3.Error, OSError) as e:
+        logging.warning(f"Gagal update index gambar {comic_id} (jalanin image-index --rebuild): {e}")
+
+def remove_comic(comic_id):
+    _connect().execute("DELETE FROM images WHERE comic = ?", (comic_id,))
+
+def rebuild(comic_ids=None):
+    """Bangun ulang index dari data komik (default: semua komik di index.json)."""
+    from storage import read_comic
+    from utils import read_json, DATA_DIR
+    started = time.perf_counter()
+    full = comic_ids is None
+    if full:
+        comic_ids = list(read_json(os.path.join(DATA_DIR, "index.json")) or {})
+        _connect().execute("DELETE FROM images")
+    total = 0
+    for comic_id in comic_ids:
+        comic_data = read_comic(comic_id)
+        if not comic_data:
+            remove_comic(comic_id)
+            continue
+        index_comic(comic_id, comic_data)
+        total += 1
+    if full:
+        _connect().execute("INSERT OR REPLACE INTO meta VALUES ('built_at', ?)", (time.strftime("%Y-%m-%dT%H:%M:%S"),))
+    logging.info(f"Index gambar dibangun ulang: {total} komik dalam {time.perf_counter() - started:.1f}s, {stats()['total']} URL")
+
+def is_built():
+    """True kalo index udah pernah dibangun penuh (update inkremental aja belum cukup buat query)."""
+    return _connect().execute("SELECT value FROM meta WHERE key = 'built_at'").fetchone() is not None
+
+def locations(url):
+    """Semua tempat URL ini dipake: list (komik, chapter, halaman); chapter None = cover."""
+    rows = _connect().execute(
+        "SELECT comic, chapter, page FROM images WHERE url = ? ORDER BY comic, chapter, page", (url,)
+    ).fetchall()
+    return [tuple(row) for row in rows]
+
+def by_host(host, comic_id=None):
+    """Jumlah halaman per (komik, chapter) yang pake host ini."""
+    query = "SELECT comic, chapter, COUNT(*) AS pages FROM images WHERE host = ?"
+    params = [host.lower()]
+    if comic_id:
+        query += " AND comic = ?"
+        params.append(comic_id)
+    query += " GROUP BY comic, chapter ORDER BY comic, chapter"
+    return [tuple(row) for row in _connect().execute(query, params).fetchall()]
+
+def non_cloudinary_pages(comic_id=None, limit=None):
+    """Halaman yang belum di Cloudinary: list (komik, chapter, halaman, url), urut per chapter."""
+    query = "SELECT comic, chapter, page, url FROM images WHERE host != ?"
+    params = [CLOUDINARY_HOST]
+    if comic_id:
+        query += " AND comic = ?"
+        params.append(comic_id)
+    query += " ORDER BY comic, chapter, page"
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+    return [tuple(row) for row in _connect().execute(query, params).fetchall()]
+
+def stats():
+    conn = _connect()
+    hosts = conn.execute("SELECT host, COUNT(*) AS total FROM images GROUP BY host ORDER BY total DESC").fetchall()
+    return {"total": sum(row["total"] for row in hosts), "hosts": {row["host"]: row["total"] for row in hosts}}
@@ -0,0 +1,94 @@
+import atexit
+import io
+import logging
+import threading
+
+# Tahap opsional antara download dan upload: gambar di-transcode ke WebP/AVIF,
+# metadata (EXIF, ICC, komentar) dibuang, plus beberapa varian lebar lebih kecil.
+# Kerjaan CPU-nya jalan di process pool, jadi thread upload lain tetap bisa download/upload.
+FORMATS = {"webp": ("WEBP", "webp"), "avif": ("AVIF", "avif")}
+DEFAULT_FORMAT = "webp"
+DEFAULT_QUALITY = 80
+DEFAULT_WIDTHS = (480, 800)
+DEFAULT_WORKERS = 2
+
+_pool = None
+_pool_lock = threading.Lock()
+_warned = set()
+
+def _pil():
+    """Modul PIL.Image, None kalo Pillow ga ada. Di-import pas dipake biar startup CLI tetap cepet."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    try:
+        # Pillow < 11 butuh plugin ini buat nyimpen AVIF
+        import pillow_avif  # noqa: F401
+    except ImportError:
+        pass
+    return Image
+
+def available(fmt=DEFAULT_FORMAT):
+    """True kalo Pillow ada dan bisa nyimpen format ini."""
+    Image = _pil()
+    if Image is None or fmt not in FORMATS:
+        return False
+    Image.init()
+    return FORMATS[fmt][0] in Image.SAVE
+
+def warn_unavailable(fmt):
+    if fmt in _warned:
+        return
+    _warned.add(fmt)
+    if _pil() is None:
+        logging.warning("Optimasi gambar aktif tapi Pillow ga ada (pip install pillow), upload gambar asli")
+    else:
+        logging.warning(f"Pillow ga bisa nyimpen {fmt} (AVIF butuh Pillow >= 11 atau pillow-avif-plugin), upload gambar asli")
+
+def _encode(image, fmt, quality):
+    out = io.BytesIO()
+    image.save(out, format=FORMATS[fmt][0], quality=quality)
+    return out.getvalue()
+
+def transcode(data, fmt=DEFAULT_FORMAT, widths=DEFAULT_WIDTHS, quality=DEFAULT_QUALITY):
+    """Transcode byte gambar. Jalan di proses worker.
+
+    Balikin {"width", "height", "data", "variants": [(lebar, data), ...]}; varian cuma
+    dibuat buat lebar yang lebih kecil dari gambar aslinya.
+    """
+    Image = _pil()
+    with Image.open(io.BytesIO(data)) as source:
+        source.load()
+        mode = "RGBA" if source.mode in ("RGBA", "LA") or "transparency" in source.info else "RGB"
+        # Gambar baru tanpa info/EXIF/ICC dari file asli
+        image = Image.new(mode, source.size)
+        image.paste(source.convert(mode))
+    width, height = image.size
+    result = {"width": width, "height": height, "data": _encode(image, fmt, quality), "variants": []}
+    for target in sorted(set(widths)):
+        if target >= width:
+            continue
+        resized = image.resize((target, max(1, round(height * target / width))), Image.LANCZOS)
+        result["variants"].append((target, _encode(resized, fmt, quality)))
+    return result
+
+def _get_pool(workers):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            atexit.register(shutdown)
+        return _pool
+
+def optimize(data, fmt=DEFAULT_FORMAT, widths=DEFAULT_WIDTHS, quality=DEFAULT_QUALITY, workers=DEFAULT_WORKERS):
+    """transcode() di process pool; thread yang manggil nunggu hasilnya."""
+    return _get_pool(workers).submit(transcode, data, fmt, tuple(widths), quality).result()
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
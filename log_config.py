@@ -0,0 +1,131 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+import metrics
+
+# Logging non-blocking: semua logger nulis ke queue (QueueHandler), satu thread
+# QueueListener yang nulis ke file/console. Thread upload ga pernah nunggu disk/terminal.
+# File dirotasi per ukuran (default) atau per waktu, opsional format JSON lines.
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+QUEUE_STATUS_LOGGER = "queue_status"
+# Log per halaman (gambar) lewat logger ini, disampling per chapter
+PAGE_LOGGER = "pages"
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUPS = 5
+DEFAULT_PAGE_LOG_FIRST = 3
+DEFAULT_PAGE_LOG_EVERY = 20
+SAMPLER_MAX_KEYS = 1000
+
+_listener = None
+
+class JsonFormatter(logging.Formatter):
+    """Satu objek JSON per baris: waktu, level, logger, pesan, komik (kalo ada)."""
+
+    def format(self, record):
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "comic", ""):
+            entry["comic"] = record.comic
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+class PageSampler(logging.Filter):
+    """Log per halaman: `first` baris pertama tiap sample_key lolos, habis itu cuma 1 dari `every`."""
+
+    def __init__(self, first=DEFAULT_PAGE_LOG_FIRST, every=DEFAULT_PAGE_LOG_EVERY):
+        super().__init__()
+        self.first = first
+        self.every = max(1, every)
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        key = getattr(record, "sample_key", None)
+        if key is None or record.levelno >= logging.WARNING:
+            return True
+        with self.lock:
+            if len(self.counts) >= SAMPLER_MAX_KEYS and key not in self.counts:
+                self.counts.clear()
+            count = self.counts.get(key, 0) + 1
+            self.counts[key] = count
+        return count <= self.first or count % self.every == 0
+
+class _ComicStamp(logging.Filter):
+    """Label komik dari thread pemanggil (metrics.comic) ditempel sebelum record masuk queue,
+    kecuali record-nya udah bawa extra={"comic": ...} sendiri."""
+
+    def filter(self, record):
+        if not getattr(record, "comic", ""):
+            record.comic = metrics.current_comic()
+        return True
+
+class _OnlyLogger(logging.Filter):
+    def __init__(self, name):
+        super().__init__()
+        self.logger_name = name
+
+    def filter(self, record):
+        return record.name == self.logger_name
+
+def _file_handler(path, rotate, max_bytes, backups):
+    if rotate == "size":
+        return logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+    # rotate = "midnight", "H", "D", ... (sama kayak TimedRotatingFileHandler when=)
+    return logging.handlers.TimedRotatingFileHandler(path, when=rotate, backupCount=backups, encoding="utf-8")
+
+def setup_logging(log_dir, rotate="size", max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS, json_lines=False,
+                  console_level=logging.INFO, page_log_first=DEFAULT_PAGE_LOG_FIRST, page_log_every=DEFAULT_PAGE_LOG_EVERY):
+    """Pasang QueueHandler di root logger + listener ke update.log, queue_status.log, dan console.
+
+    Aman dipanggil berkali-kali; listener lama dihentiin dulu.
+    """
+    global _listener
+    stop_logging()
+    formatter = JsonFormatter() if json_lines else logging.Formatter(LOG_FORMAT)
+    suffix = ".jsonl" if json_lines else ".log"
+    file_handler = _file_handler(os.path.join(log_dir, "update" + suffix), rotate, max_bytes, backups)
+    file_handler.setFormatter(formatter)
+    status_handler = _file_handler(os.path.join(log_dir, QUEUE_STATUS_LOGGER + suffix), rotate, max_bytes, backups)
+    status_handler.setFormatter(formatter)
+    status_handler.addFilter(_OnlyLogger(QUEUE_STATUS_LOGGER))
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    console_handler.setLevel(console_level)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(_ComicStamp())
+    root = logging.getLogger()
+    for handler in [h for h in root.handlers if isinstance(h, logging.handlers.QueueHandler)]:
+        root.removeHandler(handler)
+    root.setLevel(logging.INFO)
+    root.addHandler(queue_handler)
+
+    page_logger = logging.getLogger(PAGE_LOGGER)
+    for existing in [f for f in page_logger.filters if isinstance(f, PageSampler)]:
+        page_logger.removeFilter(existing)
+    page_logger.addFilter(PageSampler(page_log_first, page_log_every))
+
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, status_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+
+@atexit.register
+def stop_logging():
+    """Kosongin queue log ke file lalu tutup handler-nya."""
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
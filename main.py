@@ -1,45 +1,27 @@
 import argparse
 import logging
 import os
-import json
-from add_comic import add_comic
-from update_all import update_all
-from update_comic import update_comic
-from update_source_url import update_source_url
-from utils import read_json, write_json, setup_logging, DATA_DIR
+import metrics
+from storage import LAYOUT_SHARDED, LAYOUT_SINGLE
+from utils import DEFAULT_UPLOAD_WORKERS
 
-def update_domain(old_domain, new_domain):
-    """Update domain untuk semua komik di index.json dan file JSON komik."""
+# Modul command (requests, bs4, cloudinary, ...) baru di-import di cabang command yang
+# butuh, biar `help` dan command maintenance kecil ga bayar biaya import semuanya.
+# Budget waktu import dicek sama: python benchmark.py --startup
+# Command yang nyentuh scraper/upload, di akhir run statistik cache-nya ditampilkan
+SCRAPE_COMMANDS = ("add-comic", "update-all", "update", "daemon")
+
+def update_domain(old_domain, new_domain, dry_run=False):
+    """Update domain source_url untuk semua komik di index.json dan file JSON komik.
+    Sama kayak dulu: tiap kemunculan old_domain di source_url diganti (substring)."""
+    from url_rewrite import rewrite_urls, substring_mapping, SOURCE_FIELDS
     logging.info(f"Mengganti domain dari {old_domain} ke {new_domain}...")
-    index_file = os.path.join(DATA_DIR, "index.json")
-    index_data = read_json(index_file)
-    if not index_data:
-        logging.warning("Nggak ada komik di index.json, bro!")
-        return
-    for comic_id in index_data:
-        old_source_url = index_data[comic_id].get("source_url", "")
-        if not old_source_url:
-            logging.warning(f"Komik {comic_id} gak punya source_url, lewati.")
-            continue
-        new_source_url = old_source_url.replace(old_domain, new_domain)
-        if new_source_url == old_source_url:
-            logging.info(f"Komik {comic_id}: source_url {old_source_url} gak berubah, lewati.")
-            continue
-        index_data[comic_id]["source_url"] = new_source_url
-        logging.info(f"Komik {comic_id}: Update source_url dari {old_source_url} ke {new_source_url}")
-        comic_file = os.path.join(DATA_DIR, f"{comic_id}.json")
-        if not os.path.exists(comic_file):
-            logging.error(f"File {comic_file} gak ada, lewati.")
-            continue
-        comic_data = read_json(comic_file)
-        comic_data["source_url"] = new_source_url
-        write_json(comic_file, comic_data)
-        logging.info(f"Berhasil update {comic_file} dengan source_url baru: {new_source_url}")
-    write_json(index_file, index_data)
-    logging.info(f"Berhasil update index.json dengan domain baru.")
+    return rewrite_urls([substring_mapping(old_domain, new_domain)], fields=SOURCE_FIELDS, dry_run=dry_run)
 
 def update_path(old_url, new_url):
     """Update source_url untuk komik spesifik dari URL lama ke URL baru."""
+    from storage import read_comic, write_comic
+    from utils import read_json, write_json, DATA_DIR
     logging.info(f"Mengganti source_url dari {old_url} ke {new_url}...")
     index_file = os.path.join(DATA_DIR, "index.json")
     index_data = read_json(index_file)
@@ -60,59 +42,221 @@ def update_path(old_url, new_url):
     if not os.path.exists(comic_file):
         logging.error(f"File {comic_file} gak ada, bro!")
         return
-    comic_data = read_json(comic_file)
+    comic_data = read_comic(comic_id, with_images=False)
     comic_data["source_url"] = new_url
-    write_json(comic_file, comic_data)
+    write_comic(comic_id, comic_data, changed=[])
     logging.info(f"Berhasil update {comic_file} dengan source_url baru: {new_url}")
     write_json(index_file, index_data)
     logging.info(f"Berhasil update index.json dengan source_url baru.")
 
 def main():
-    setup_logging()
     parser = argparse.ArgumentParser(description="GreedyComicHub CLI")
+    parser.add_argument("--metrics", action="store_true", help="Catat metrik per tahap ke metrics/ (textfile Prometheus + laporan JSON)")
     subparsers = parser.add_subparsers(dest="command")
     # Parser untuk add-comic
     add_parser = subparsers.add_parser("add-comic", help="Tambah komik baru")
     add_parser.add_argument("url", help="URL komik di komiku.org")
     # Parser untuk update-all
     update_all_parser = subparsers.add_parser("update-all", help="Update semua komik")
+    update_all_parser.add_argument("--workers", type=int, default=DEFAULT_UPLOAD_WORKERS, help="Jumlah upload gambar paralel")
+    update_all_parser.add_argument("--parallel", type=int, default=1, help="Jumlah komik yang diproses barengan")
+    update_all_parser.add_argument("--catch-up", action="store_true", help="Ambil semua chapter yang ketinggalan, bukan cuma chapter berikutnya")
+    update_all_parser.add_argument("--budget", type=int, help="Maksimal chapter per run buat --catch-up (default 100)")
+    # Parser untuk daemon
+    daemon_parser = subparsers.add_parser("daemon", help="Jalan terus, cek tiap komik sesuai jadwal rilisnya")
+    daemon_parser.add_argument("--max-comics", "--budget", dest="max_comics", type=int, help="Maksimal komik yang dicek per putaran, tiap komik paling banyak satu chapter baru (default 20)")
+    daemon_parser.add_argument("--tick", type=int, help="Jeda maksimal antar putaran (detik, default 300)")
+    daemon_parser.add_argument("--parallel", type=int, default=1, help="Jumlah komik yang dicek barengan")
+    daemon_parser.add_argument("--workers", type=int, default=DEFAULT_UPLOAD_WORKERS, help="Jumlah upload gambar paralel")
+    daemon_parser.add_argument("--once", action="store_true", help="Satu putaran aja (buat cron)")
     # Parser untuk update
     update_parser = subparsers.add_parser("update", help="Update chapter tertentu")
     update_parser.add_argument("url", help="URL komik")
     update_parser.add_argument("--start", type=float, required=True, help="Chapter mulai")
     update_parser.add_argument("--end", type=float, required=True, help="Chapter akhir")
     update_parser.add_argument("--overwrite", action="store_true", help="Overwrite chapter")
+    update_parser.add_argument("--workers", type=int, default=DEFAULT_UPLOAD_WORKERS, help="Jumlah upload gambar paralel")
     # Parser untuk update-source-url
     source_url_parser = subparsers.add_parser("update-source-url", help="Ganti URL lama ke URL baru")
     source_url_parser.add_argument("old_url", help="URL lama")
     source_url_parser.add_argument("new_url", help="URL baru")
+    source_url_parser.add_argument("--dry-run", action="store_true", help="Cuma tampilkan file yang bakal berubah")
     # Parser untuk update-domain
     domain_parser = subparsers.add_parser("update-domain", help="Ganti domain semua komik")
     domain_parser.add_argument("old_domain", help="Domain lama (misalnya, komiku.org)")
     domain_parser.add_argument("new_domain", help="Domain baru (misalnya, komiku.id)")
+    domain_parser.add_argument("--dry-run", action="store_true", help="Cuma tampilkan file yang bakal berubah")
+    # Parser untuk rewrite-urls
+    rewrite_parser = subparsers.add_parser("rewrite-urls", help="Ganti banyak URL/domain sekaligus di semua file data")
+    rewrite_parser.add_argument("--url", nargs=2, action="append", default=[], metavar=("LAMA", "BARU"), help="Ganti URL persis (bisa berkali-kali)")
+    rewrite_parser.add_argument("--domain", nargs=2, action="append", default=[], metavar=("LAMA", "BARU"), help="Ganti host yang persis sama, termasuk //host; subdomain (www., img.) ga ikut (bisa berkali-kali)")
+    rewrite_parser.add_argument("--fields", choices=["all", "images", "source"], default="all", help="Field yang diganti")
+    rewrite_parser.add_argument("--workers", type=int, default=4, help="Jumlah proses paralel")
+    rewrite_parser.add_argument("--dry-run", action="store_true", help="Cuma tampilkan file yang bakal berubah")
     # Parser untuk update-path
     path_parser = subparsers.add_parser("update-path", help="Ganti source_url komik spesifik")
     path_parser.add_argument("old_url", help="URL komik yang error")
     path_parser.add_argument("new_url", help="URL komik yang baru")
+    # Parser untuk image-cache
+    cache_parser = subparsers.add_parser("image-cache", help="Statistik / prune / rebuild cache gambar Cloudinary")
+    cache_parser.add_argument("--prune", action="store_true", help="Buang entry yang gambarnya udah ga dipake di data/*.json")
+    cache_parser.add_argument("--rebuild", action="store_true", help="Prune, lalu download dan hash gambar Cloudinary yang belum punya hash")
+    # Parser untuk image-index
+    index_parser = subparsers.add_parser("image-index", help="Cari lokasi gambar berdasarkan URL/host")
+    index_parser.add_argument("--url", help="Tampilkan komik/chapter/halaman yang pake URL ini")
+    index_parser.add_argument("--host", help="Tampilkan chapter yang masih pake host ini (misal img.komiku.org)")
+    index_parser.add_argument("--comic", help="Batasi ke satu komik")
+    index_parser.add_argument("--not-cloudinary", action="store_true", help="Tampilkan halaman yang belum di Cloudinary")
+    index_parser.add_argument("--rebuild", action="store_true", help="Bangun ulang index dari data/")
+    # Parser untuk reupload-pages
+    reupload_parser = subparsers.add_parser("reupload-pages", help="Upload ulang halaman yang belum di Cloudinary")
+    reupload_parser.add_argument("--comic", help="ID komik (default: semua)")
+    reupload_parser.add_argument("--limit", type=int, help="Maksimal halaman per run")
+    reupload_parser.add_argument("--workers", type=int, default=DEFAULT_UPLOAD_WORKERS, help="Jumlah upload gambar paralel")
+    # Parser untuk migrate-layout
+    layout_parser = subparsers.add_parser("migrate-layout", help="Pindahin data komik ke layout single/sharded")
+    layout_parser.add_argument("--to", choices=[LAYOUT_SHARDED, LAYOUT_SINGLE], default=LAYOUT_SHARDED, help="Layout tujuan")
+    layout_parser.add_argument("--comic", help="ID komik (default: semua komik di index.json)")
+    # Parser untuk reindex
+    reindex_parser = subparsers.add_parser("reindex", help="Hitung ulang ringkasan chapter di index.json")
+    reindex_parser.add_argument("--comic", help="ID komik (default: semua komik di index.json)")
+    # Parser untuk normalize-chapters
+    normalize_parser = subparsers.add_parser("normalize-chapters", help="Normalisasi key chapter (\"1.0\" -> \"1\")")
+    normalize_parser.add_argument("--comic", help="ID komik (default: semua komik di index.json)")
+    # Parser untuk queue
+    queue_parser = subparsers.add_parser("queue", help="Queue tugas add/update (SQLite)")
+    queue_parser.add_argument("--import", dest="import_file", help="Import tugas dari queue.json / file .jsonl")
+    queue_parser.add_argument("--run", action="store_true", help="Kerjain tugas yang udah siap")
+    queue_parser.add_argument("--max-tasks", type=int, default=10, help="Maksimal tugas per run")
+    queue_parser.add_argument("--workers", type=int, default=1, help="Jumlah worker barengan")
+    queue_parser.add_argument("--retry-failed", action="store_true", help="Antriin ulang tugas yang gagal permanen")
+    queue_parser.add_argument("--list", nargs="?", const="", metavar="STATUS", help="Tampilkan tugas (pending/running/done/failed)")
+    # Parser untuk publish
+    publish_parser = subparsers.add_parser("publish", help="Bangun JSON minified + .gz/.br buat frontend di public/data/")
+    publish_parser.add_argument("--compact", action="store_true", help="Simpen daftar gambar sebagai template URL + bagian yang beda")
+    publish_parser.add_argument("--force", action="store_true", help="Bangun ulang semua file walau ga berubah")
+    # Parser untuk push
+    push_parser = subparsers.add_parser("push", help="Publish + commit/push file data yang berubah ke GitHub")
+    push_parser.add_argument("--now", action="store_true", help="Langsung commit, ga nunggu jendela penggabungan")
     # Parser untuk help
     help_parser = subparsers.add_parser("help", help="Tampilkan bantuan")
     args = parser.parse_args()
+    if args.command == "help" or not args.command:
+        parser.print_help()
+        return
+    from utils import setup_logging
+    setup_logging()
+    if args.metrics:
+        metrics.enable()
     if args.command == "add-comic":
+        from add_comic import add_comic
         add_comic(args.url)
     elif args.command == "update-all":
-        update_all()
+        from update_all import update_all, DEFAULT_CATCH_UP_BUDGET
+        update_all(workers=args.workers, parallel=args.parallel, catch_up=args.catch_up,
+                   budget=DEFAULT_CATCH_UP_BUDGET if args.budget is None else args.budget)
+    elif args.command == "daemon":
+        from scheduler import run_daemon, run_once, DEFAULT_COMIC_BUDGET, DEFAULT_TICK
+        budget = DEFAULT_COMIC_BUDGET if args.max_comics is None else args.max_comics
+        if args.once:
+            run_once(budget, args.parallel, workers=args.workers)
+        else:
+            run_daemon(budget, args.parallel, DEFAULT_TICK if args.tick is None else args.tick, workers=args.workers)
     elif args.command == "update":
-        update_comic(args.url, args.start, args.end, args.overwrite)
+        from update_comic import update_comic
+        update_comic(args.url, args.start, args.end, args.overwrite, args.workers)
     elif args.command == "update-source-url":
-        update_source_url(args.old_url, args.new_url)
+        from update_source_url import update_source_url
+        update_source_url(args.old_url, args.new_url, args.dry_run)
     elif args.command == "update-domain":
-        update_domain(args.old_domain, args.new_domain)
+        update_domain(args.old_domain, args.new_domain, args.dry_run)
+    elif args.command == "rewrite-urls":
+        from url_rewrite import rewrite_urls, domain_mapping, url_mapping, SOURCE_FIELDS, IMAGE_FIELDS
+        mappings = [url_mapping(old, new) for old, new in args.url] + [domain_mapping(old, new) for old, new in args.domain]
+        if not mappings:
+            logging.error("Kasih minimal satu --url atau --domain, bro!")
+        else:
+            fields = {"all": None, "images": IMAGE_FIELDS, "source": SOURCE_FIELDS}[args.fields]
+            rewrite_urls(mappings, fields=fields, dry_run=args.dry_run, workers=args.workers)
     elif args.command == "update-path":
         update_path(args.old_url, args.new_url)
-    elif args.command == "help" or not args.command:
-        parser.print_help()
+    elif args.command == "image-cache":
+        import image_cache
+        from utils import download_image, compact_all, DATA_DIR
+        if args.rebuild:
+            compact_all()
+            image_cache.rebuild(DATA_DIR, fetch=download_image)
+        elif args.prune:
+            compact_all()
+            image_cache.prune(DATA_DIR)
+        logging.info(f"Cache gambar: {image_cache.stats()}")
+    elif args.command == "image-index":
+        import image_index
+        if args.rebuild or not image_index.is_built():
+            image_index.rebuild()
+        if args.url:
+            for comic_id, chapter, page in image_index.locations(args.url):
+                logging.info(f"- {comic_id}: {'cover' if chapter is None else f'chapter {chapter} halaman {page}'}")
+        if args.host:
+            for comic_id, chapter, pages in image_index.by_host(args.host, args.comic):
+                logging.info(f"- {comic_id}: {'cover' if chapter is None else f'chapter {chapter}'} ({pages} halaman)")
+        if args.not_cloudinary:
+            for comic_id, chapter, page, url in image_index.non_cloudinary_pages(args.comic):
+                logging.info(f"- {comic_id}: {'cover' if chapter is None else f'chapter {chapter} halaman {page}'} {url}")
+        logging.info(f"Index gambar: {image_index.stats()}")
+    elif args.command == "reupload-pages":
+        from reupload_pages import reupload_pages
+        reupload_pages(args.comic, args.limit, args.workers)
+    elif args.command == "migrate-layout":
+        from storage import migrate_all, migrate_comic
+        if args.comic:
+            migrate_comic(args.comic, args.to)
+        else:
+            migrate_all(args.to)
+    elif args.command == "reindex":
+        from storage import refresh_index
+        from utils import read_json, DATA_DIR
+        comic_ids = [args.comic] if args.comic else list(read_json(os.path.join(DATA_DIR, "index.json")) or {})
+        for comic_id in comic_ids:
+            refresh_index(comic_id)
+        logging.info(f"Ringkasan {len(comic_ids)} komik di index.json diperbarui")
+    elif args.command == "normalize-chapters":
+        from storage import normalize_comic
+        from utils import read_json, DATA_DIR
+        comic_ids = [args.comic] if args.comic else list(read_json(os.path.join(DATA_DIR, "index.json")) or {})
+        renamed = sum(normalize_comic(comic_id) for comic_id in comic_ids)
+        logging.info(f"Normalisasi selesai: {renamed} key chapter diganti")
+    elif args.command == "queue":
+        import task_queue
+        from processor import process_queue, import_queue_file
+        if args.import_file:
+            import_queue_file(args.import_file)
+        if args.retry_failed:
+            logging.info(f"{task_queue.retry_failed()} tugas gagal diantriin ulang")
+        if args.run:
+            process_queue(args.max_tasks, args.workers)
+        if args.list is not None:
+            for task in task_queue.list_tasks(args.list or None):
+                logging.info(f"#{task['id']} [{task['status']}] {task['kind']} {task['payload']} prioritas={task['priority']} percobaan={task['attempts']} {task['last_error'] or ''}")
+        logging.info(f"Queue: {task_queue.stats()}")
+    elif args.command == "publish":
+        from publish import publish_all
+        publish_all(compact=args.compact or None, force=args.force)
+    elif args.command == "push":
+        from utils import push_to_github
+        push_to_github(args.now)
     else:
         parser.print_help()
+    if args.command in SCRAPE_COMMANDS or (args.command == "queue" and args.run):
+        import image_cache
+        import selector_cache
+        from scraper import parse_stats
+        logging.info(f"Cache gambar: {image_cache.stats()}")
+        logging.info(f"Parse HTML: {parse_stats()}")
+        logging.info(f"Cache selector: {selector_cache.stats()}")
+    report_path = metrics.write_outputs(args.command)
+    if report_path:
+        logging.info(f"Metrik run ditulis ke {report_path}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,226 @@
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Metrik per tahap (fetch, parse, download, upload, read_json, write_json, push):
+# histogram latency, byte, retry, error, semua dilabel per komik. Mati secara default;
+# kalo mati, timer() cuma balikin objek no-op yang sama, jadi overhead-nya satu cek bool.
+# Tiap command main.py selesai, hasilnya ditulis ke textfile Prometheus + laporan JSON.
+METRICS_DIR = "metrics"
+TEXTFILE = "greedycomichub.prom"
+REPORT_FILE = "run_report.json"
+PREFIX = "greedycomichub"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+ENABLED = False
+_lock = threading.Lock()
+_local = threading.local()
+_histograms = {}
+_counters = {}
+_started = time.time()
+
+def enable(metrics_dir=None):
+    global ENABLED, METRICS_DIR
+    ENABLED = True
+    if metrics_dir:
+        METRICS_DIR = metrics_dir
+
+def current_comic():
+    return getattr(_local, "comic", "")
+
+@contextmanager
+def comic(comic_id):
+    """Label komik buat semua metrik (dan log) di thread ini selama blok jalan."""
+    previous = current_comic()
+    _local.comic = comic_id or ""
+    try:
+        yield
+    finally:
+        _local.comic = previous
+
+def labelled(comic_of):
+    """Decorator: fungsinya jalan di bawah comic(comic_of(*args, **kwargs)).
+
+    Label tetap dipasang walau metrik mati, soalnya log (log_config) juga baca current_comic();
+    yang dicek ENABLED cuma pencatatan metriknya.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with comic(comic_of(*args, **kwargs)):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class _Timer:
+    __slots__ = ("stage", "comic", "started", "bytes")
+
+    def __init__(self, stage, comic_id):
+        self.stage = stage
+        self.comic = current_comic() if comic_id is None else comic_id
+        self.bytes = 0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.stage, time.perf_counter() - self.started, self.comic)
+        if self.bytes:
+            add_bytes(self.stage, self.bytes, self.comic)
+        if exc_type is not None:
+            inc_error(self.stage, self.comic)
+        return False
+
+    def add_bytes(self, count):
+        self.bytes += count
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def add_bytes(self, count):
+        pass
+
+_NOOP = _NoopTimer()
+
+def timer(stage, comic_id=None):
+    """`with metrics.timer("upload", comic_id) as t:` — latency masuk histogram, exception
+    dihitung error. comic_id None = label komik thread ini."""
+    if not ENABLED:
+        return _NOOP
+    return _Timer(stage, comic_id)
+
+def observe(stage, seconds, comic_id=None):
+    if not ENABLED:
+        return
+    key = (stage, current_comic() if comic_id is None else comic_id)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {"buckets": [0] * (len(BUCKETS) + 1), "sum": 0.0, "count": 0}
+        histogram["buckets"][bisect.bisect_left(BUCKETS, seconds)] += 1
+        histogram["sum"] += seconds
+        histogram["count"] += 1
+
+def _inc(name, stage, amount, comic_id):
+    if not ENABLED:
+        return
+    key = (name, stage, current_comic() if comic_id is None else comic_id)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+def add_bytes(stage, count, comic_id=None):
+    _inc("bytes", stage, count, comic_id)
+
+def inc_retry(stage, comic_id=None):
+    _inc("retries", stage, 1, comic_id)
+
+def inc_error(stage, comic_id=None):
+    _inc("errors", stage, 1, comic_id)
+
+def reset():
+    global _started
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+        _started = time.time()
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(stage, comic_id):
+    return f'stage="{_escape(stage)}",comic="{_escape(comic_id)}"'
+
+def render_textfile():
+    """Format teks Prometheus (buat textfile collector node_exporter)."""
+    with _lock:
+        histograms = {key: dict(value, buckets=list(value["buckets"])) for key, value in _histograms.items()}
+        counters = dict(_counters)
+    lines = [
+        f"# HELP {PREFIX}_stage_seconds Latency per tahap.",
+        f"# TYPE {PREFIX}_stage_seconds histogram",
+    ]
+    for (stage, comic_id), histogram in sorted(histograms.items()):
+        labels = _labels(stage, comic_id)
+        cumulative = 0
+        for bound, count in zip(BUCKETS + (float("inf"),), histogram["buckets"]):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{PREFIX}_stage_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f"{PREFIX}_stage_seconds_sum{{{labels}}} {histogram['sum']:.6f}")
+        lines.append(f"{PREFIX}_stage_seconds_count{{{labels}}} {histogram['count']}")
+    for name, help_text in (("bytes", "Byte yang diproses per tahap."), ("retries", "Retry per tahap."), ("errors", "Error per tahap.")):
+        lines.append(f"# HELP {PREFIX}_stage_{name}_total {help_text}")
+        lines.append(f"# TYPE {PREFIX}_stage_{name}_total counter")
+        for (counter, stage, comic_id), value in sorted(counters.items()):
+            if counter == name:
+                lines.append(f"{PREFIX}_stage_{name}_total{{{_labels(stage, comic_id)}}} {value}")
+    lines.append(f"# TYPE {PREFIX}_last_run_timestamp_seconds gauge")
+    lines.append(f"{PREFIX}_last_run_timestamp_seconds {time.time():.0f}")
+    return "\n".join(lines) + "\n"
+
+def _quantile(histogram, q):
+    """Perkiraan kuantil dari bucket (batas atas bucket-nya)."""
+    target = q * histogram["count"]
+    cumulative = 0
+    for bound, count in zip(BUCKETS + (None,), histogram["buckets"]):
+        cumulative += count
+        if cumulative >= target:
+            return bound
+    return None
+
+def report(command=None):
+    """Ringkasan run: per tahap total + per komik."""
+    with _lock:
+        histograms = dict(_histograms)
+        counters = dict(_counters)
+    stages = {}
+    for (stage, comic_id), histogram in histograms.items():
+        entry = stages.setdefault(stage, {"count": 0, "seconds": 0.0, "bytes": 0, "retries": 0, "errors": 0, "comics": {}})
+        entry["count"] += histogram["count"]
+        entry["seconds"] += histogram["sum"]
+        entry["comics"][comic_id or "-"] = {
+            "count": histogram["count"],
+            "seconds": round(histogram["sum"], 4),
+            "p50": _quantile(histogram, 0.5),
+            "p95": _quantile(histogram, 0.95),
+        }
+    for (name, stage, comic_id), value in counters.items():
+        entry = stages.setdefault(stage, {"count": 0, "seconds": 0.0, "bytes": 0, "retries": 0, "errors": 0, "comics": {}})
+        entry[name] += value
+        entry["comics"].setdefault(comic_id or "-", {})[name] = value
+    for entry in stages.values():
+        entry["seconds"] = round(entry["seconds"], 4)
+    return {
+        "command": command,
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(_started)),
+        "finished": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "duration": round(time.time() - _started, 3),
+        "stages": stages,
+    }
+
+def _write_atomic(path, content):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(temp_path, path)
+
+def write_outputs(command=None):
+    """Tulis textfile Prometheus + laporan JSON ke METRICS_DIR. Balikin path laporan, None kalo mati."""
+    if not ENABLED:
+        return None
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    _write_atomic(os.path.join(METRICS_DIR, TEXTFILE), render_textfile())
+    report_path = os.path.join(METRICS_DIR, REPORT_FILE)
+    _write_atomic(report_path, json.dumps(report(command), indent=4))
+    return report_path
@@ -1,45 +1,65 @@
 import logging
-import time
 import os
+import task_queue
+from concurrent.futures import ThreadPoolExecutor
 from add_comic import add_comic
+from budget import ChapterBudget
 from update_comic import update_comic
-from utils import read_json, write_json, QUEUE_FILE, LOG_DIR
+from log_config import QUEUE_STATUS_LOGGER
+from utils import read_json, write_json, QUEUE_FILE
 
-def process_queue(max_tasks=10):
-    logging.info(f"Memproses queue (max {max_tasks} tugas)...")
-    queue = read_json(QUEUE_FILE)
-    if not queue:
-        logging.info("Queue kosong.")
-        return
-    processed = 0
-    new_queue = []
-    for task in queue:
-        if processed >= max_tasks:
-            new_queue.append(task)
-            continue
-        try:
-            log_entry = f"{time.strftime('%Y-%m-%d %H:%M:%S')} - INFO - Processing task: {task}"
-            with open(os.path.join(LOG_DIR, "queue_status.log"), "a", encoding="utf-8") as f:
-                f.write(log_entry + "\n")
-            logging.info(log_entry)
-            if task["task"] == "add_comic":
-                add_comic(task["url"])
-            elif task["task"] == "update_comic":
-                update_comic(
-                    task["url"],
-                    task.get("start", 1.0),
-                    task.get("end", 1.0),
-                    task.get("overwrite", False)
-                )
-            processed += 1
-        except Exception as e:
-            error_entry = f"{time.strftime('%Y-%m-%d %H:%M:%S')} - ERROR - Failed task: {task} ({str(e)})"
-            with open(os.path.join(LOG_DIR, "queue_status.log"), "a", encoding="utf-8") as f:
-                f.write(error_entry + "\n")
-            logging.error(error_entry)
-            new_queue.append(task)
-    write_json(QUEUE_FILE, new_queue)
-    final_log = f"{time.strftime('%Y-%m-%d %H:%M:%S')} - INFO - Selesai memproses {processed} tugas, {len(new_queue)} tugas tersisa"
-    with open(os.path.join(LOG_DIR, "queue_status.log"), "a", encoding="utf-8") as f:
-        f.write(final_log + "\n")
-    logging.info(final_log)
\ No newline at end of file
+# Handler queue_status.log (rotasi, lewat queue) dipasang sama utils.setup_logging
+queue_logger = logging.getLogger(QUEUE_STATUS_LOGGER)
+
+HANDLERS = {
+    "add_comic": lambda payload: add_comic(payload["url"]),
+    "update_comic": lambda payload: update_comic(
+        payload["url"],
+        payload.get("start", 1.0),
+        payload.get("end", payload.get("start", 1.0)),
+        payload.get("overwrite", False)
+    ),
+}
+
+def _log_event(event, task, detail):
+    label = f"#{task['id']} {task['kind']} {task['payload']} (percobaan {task['attempts']})"
+    if event == "start":
+        queue_logger.info(f"Processing task: {label}")
+    elif event == "done":
+        queue_logger.info(f"Selesai: {label}")
+    elif event == "retry":
+        queue_logger.warning(f"Gagal, dijadwal ulang: {label} ({detail})")
+    else:
+        queue_logger.error(f"Failed task, percobaan habis: {label} ({detail})")
+
+def import_queue_file(path=QUEUE_FILE):
+    """Pindahin isi queue.json / *.jsonl ke queue SQLite. queue.json dikosongin setelahnya
+    biar tugasnya ga ke-import dua kali."""
+    if not os.path.exists(path):
+        return 0
+    try:
+        added, duplicates, skipped = task_queue.import_file(path)
+    except ValueError as e:
+        queue_logger.error(f"Gagal baca {path}, ga di-import: {e}")
+        return 0
+    if os.path.abspath(path) == os.path.abspath(QUEUE_FILE) and read_json(QUEUE_FILE):
+        write_json(QUEUE_FILE, [])
+    if added or duplicates or skipped:
+        queue_logger.info(f"Import {path}: {added} tugas baru, {duplicates} dobel, {skipped} dilewati")
+    return added
+
+def process_queue(max_tasks=10, workers=1):
+    """Kerjain maksimal max_tasks tugas dari queue pake beberapa worker barengan."""
+    import_queue_file()
+    logging.info(f"Memproses queue (max {max_tasks} tugas, {workers} worker)...")
+    budget = ChapterBudget(max_tasks)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(task_queue.work, HANDLERS, budget, on_event=_log_event) for _ in range(max(1, workers))]
+        results = [future.result() for future in futures]
+    succeeded = sum(ok for ok, _ in results)
+    failed = sum(failed for _, failed in results)
+    counts = task_queue.stats()
+    queue_logger.info(
+        f"Selesai memproses {succeeded + failed} tugas ({succeeded} berhasil, {failed} gagal), "
+        f"{counts[task_queue.PENDING]} tugas tersisa, {counts[task_queue.FAILED]} gagal permanen"
+    )
@@ -0,0 +1,148 @@
+import glob
+import gzip
+import json
+import logging
+import os
+from utils import read_json, compact_all, settings, DATA_DIR
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Artefak buat frontend: data/*.json versi minified + .gz + .br (kalo modul brotli ada)
+# di public/data/, struktur foldernya sama. File cuma dibangun ulang kalo sumbernya berubah.
+# GitHub Pages ga pernah ngirim .gz/.br sebagai Content-Encoding (dia kompres sendiri), jadi
+# varian itu ga ikut di-push (lihat git_publish.SKIP_SUFFIXES). Kepake kalo public/ di-host
+# server yang bisa kirim file precompressed, misal nginx gzip_static/brotli_static.
+PUBLISH_DIR = os.path.join("public", "data")
+PUBLISH_MANIFEST = os.path.join(PUBLISH_DIR, ".publish.json")
+SKIP_FILES = ("queue.json",)
+IMAGE_KEYS = ("images", "pages")
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+def factor_urls(urls):
+    """Pisahin bagian URL yang sama semua: {"template": "https://.../{}/folder/{}", "values": ["v1/a.jpg", ...]}.
+
+    URL dipecah per "/", segmen yang beda-beda jadi {} dan isinya disimpen per halaman
+    (digabung pake "/"). Balikin None kalo jumlah segmennya ga seragam atau ga ada untungnya.
+    """
+    if len(urls) < 2:
+        return None
+    parts = [url.split("/") for url in urls]
+    if len({len(segments) for segments in parts}) != 1:
+        return None
+    varying = [i for i in range(len(parts[0])) if len({segments[i] for segments in parts}) > 1]
+    if any("{}" in segment for segment in parts[0]):
+        return None
+    template = "/".join("{}" if i in varying else segment for i, segment in enumerate(parts[0]))
+    return {"template": template, "values": ["/".join(segments[i] for i in varying) for segments in parts]}
+
+def expand_urls(value):
+    """Kebalikan factor_urls (buat ngecek hasil encode)."""
+    if isinstance(value, list):
+        return value
+    template = value["template"].split("/")
+    urls = []
+    for item in value["values"]:
+        parts = iter(item.split("/"))
+        urls.append("/".join(next(parts) if segment == "{}" else segment for segment in template))
+    return urls
+
+def compact_encode(data):
+    """Ganti daftar gambar tiap chapter (atau file chapter sharded) pake versi template."""
+    chapters = data.get("chapters", {}).values() if "chapters" in data else [data]
+    for chapter in chapters:
+        if not isinstance(chapter, dict):
+            continue
+        for key in IMAGE_KEYS:
+            factored = factor_urls(chapter.get(key) or [])
+            if factored:
+                chapter[key] = factored
+    return data
+
+def _source_files(data_dir):
+    files = glob.glob(os.path.join(data_dir, "*.json")) + glob.glob(os.path.join(data_dir, "*", "*.json"))
+    return sorted(path for path in files if os.path.basename(path) not in SKIP_FILES)
+
+def _load_manifest():
+    try:
+        with open(PUBLISH_MANIFEST, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_bytes(path, content):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(content)
+    os.replace(temp_path, path)
+
+def publish_file(source, target, compact=False):
+    """Tulis target (minified) + target.gz + target.br. Balikin ukuran {varian: byte}."""
+    data = read_json(source)
+    if compact and isinstance(data, dict):
+        data = compact_encode(data)
+    content = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    sizes = {"json": len(content)}
+    _write_bytes(target, content)
+    gzipped = gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+    _write_bytes(target + ".gz", gzipped)
+    sizes["gz"] = len(gzipped)
+    if brotli is not None:
+        compressed = brotli.compress(content, quality=BROTLI_QUALITY)
+        _write_bytes(target + ".br", compressed)
+        sizes["br"] = len(compressed)
+    return sizes
+
+def _remove_outputs(target):
+    for path in (target, target + ".gz", target + ".br"):
+        if os.path.exists(path):
+            os.remove(path)
+
+def publish_all(data_dir=DATA_DIR, compact=None, force=False):
+    """Bangun artefak yang sumbernya berubah sejak publish terakhir. Balikin jumlah file yang dibangun.
+
+    compact=None ikut config.ini: [Publish] Compact = true nyimpen daftar gambar tiap chapter
+    sebagai template + bagian yang beda.
+    """
+    if compact is None:
+        compact = settings().config.getboolean("Publish", "Compact", fallback=False)
+    compact_all(data_dir)
+    if brotli is None:
+        logging.warning("Modul brotli ga ada, varian .br dilewati (pip install brotli)")
+    manifest = {} if force else _load_manifest()
+    new_manifest = {}
+    built = skipped = 0
+    raw_bytes = out_bytes = 0
+    for source in _source_files(data_dir):
+        relative = os.path.relpath(source, data_dir)
+        target = os.path.join(PUBLISH_DIR, relative)
+        stat = os.stat(source)
+        stamp = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "compact": compact, "brotli": brotli is not None}
+        previous = manifest.get(relative, {})
+        if previous.get("stamp") == stamp and os.path.exists(target):
+            new_manifest[relative] = previous
+            skipped += 1
+            continue
+        try:
+            sizes = publish_file(source, target, compact)
+        except (OSError, ValueError) as e:
+            logging.error(f"Gagal publish {source}: {e}")
+            continue
+        new_manifest[relative] = {"stamp": stamp, "sizes": sizes}
+        built += 1
+        raw_bytes += stat.st_size
+        out_bytes += sizes.get("br", sizes["gz"])
+    # Artefak yang sumbernya udah ga ada dibuang
+    for relative in set(manifest) - set(new_manifest):
+        _remove_outputs(os.path.join(PUBLISH_DIR, relative))
+    os.makedirs(PUBLISH_DIR, exist_ok=True)
+    _write_bytes(PUBLISH_MANIFEST, json.dumps(new_manifest, indent=4).encode("utf-8"))
+    if built:
+        logging.info(f"Publish: {built} file dibangun ulang ({raw_bytes / 1024:.0f} KB -> {out_bytes / 1024:.0f} KB terkompres), {skipped} ga berubah")
+    else:
+        logging.info(f"Publish: semua {skipped} file udah up to date")
+    return built
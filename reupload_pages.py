@@ -0,0 +1,66 @@
+import logging
+import image_index
+from itertools import groupby
+from storage import read_comic, read_chapter, write_comic, IMAGE_KEYS
+from utils import upload_chapter_images, chapter_image_meta, update_index, upload_to_cloudinary, DEFAULT_UPLOAD_WORKERS
+
+def reupload_pages(comic_id=None, limit=None, workers=DEFAULT_UPLOAD_WORKERS):
+    """Upload ulang ke Cloudinary halaman/cover yang masih nunjuk ke host lain, pake index gambar.
+    Balikin jumlah halaman yang berhasil dipindah."""
+    if not image_index.is_built():
+        image_index.rebuild()
+    pages = image_index.non_cloudinary_pages(comic_id, limit)
+    if not pages:
+        logging.info("Semua halaman udah di Cloudinary, bro!")
+        return 0
+    logging.info(f"{len(pages)} halaman belum di Cloudinary, mulai upload ulang...")
+    moved = 0
+    for current_comic, comic_pages in groupby(pages, key=lambda row: row[0]):
+        comic_data = read_comic(current_comic, with_images=False)
+        if not comic_data:
+            logging.warning(f"Komik {current_comic} ga ada di data, lewati.")
+            continue
+        for chapter_key, chapter_pages in groupby(comic_pages, key=lambda row: row[1]):
+            chapter_pages = list(chapter_pages)
+            if chapter_key is None:
+                moved += _reupload_cover(current_comic, comic_data, chapter_pages[0][3])
+                continue
+            moved += _reupload_chapter(current_comic, comic_data, chapter_key, chapter_pages, workers)
+    logging.info(f"Upload ulang selesai: {moved} dari {len(pages)} halaman pindah ke Cloudinary")
+    return moved
+
+def _reupload_cover(comic_id, comic_data, url):
+    if comic_data.get("cover") != url:
+        return 0
+    new_url = upload_to_cloudinary(url, comic_id, "cover")
+    if new_url == url:
+        return 0
+    comic_data["cover"] = new_url
+    write_comic(comic_id, comic_data, changed=[])
+    update_index(comic_id, {"cover": new_url})
+    return 1
+
+def _reupload_chapter(comic_id, comic_data, chapter_key, chapter_pages, workers):
+    chapter = read_chapter(comic_id, comic_data, chapter_key)
+    image_key = next((key for key in IMAGE_KEYS if key in chapter), None)
+    if not image_key:
+        return 0
+    images = chapter[image_key]
+    # Index bisa ketinggalan dari data; halaman yang URL-nya udah beda dilewati
+    positions = [page - 1 for _, _, page, url in chapter_pages if page <= len(images) and images[page - 1] == url]
+    if not positions:
+        return 0
+    uploaded, failures = upload_chapter_images([images[i] for i in positions], comic_id, chapter_key, workers)
+    moved = 0
+    for i, new_url in zip(positions, uploaded):
+        if new_url != images[i]:
+            images[i] = new_url
+            moved += 1
+    if moved:
+        image_meta = chapter_image_meta(images) if image_key == "images" else None
+        if image_meta:
+            chapter["image_meta"] = image_meta
+        comic_data["chapters"][chapter_key] = chapter
+        write_comic(comic_id, comic_data, changed=[chapter_key])
+    logging.info(f"Komik {comic_id} chapter {chapter_key}: {moved} halaman dipindah, {len(failures)} gagal")
+    return moved
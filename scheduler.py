@@ -0,0 +1,197 @@
+import heapq
+import json
+import logging
+import os
+import statistics
+import time
+import http_cache
+import metrics
+from concurrent.futures import ThreadPoolExecutor
+from scraper import make_soup, scrape_release_dates, CHAPTER_LIST_STRAINER
+from update_all import update_one
+from utils import read_json, DATA_DIR, DEFAULT_UPLOAD_WORKERS
+
+# Jadwal cek per komik, dipelajari dari riwayat rilis chapter: tanggal di daftar chapter
+# (td.tanggalseries) plus waktu chapter baru pertama kali kita temukan.
+SCHEDULE_FILE = os.path.join("cache", "schedule.json")
+HOUR = 3600
+DAY = 24 * HOUR
+DEFAULT_INTERVAL = DAY
+MIN_INTERVAL = HOUR
+MAX_INTERVAL = 30 * DAY
+# Deket jadwal rilis, cek tiap interval/NEAR_POLL_DIVISOR (minimal MIN_POLL)
+NEAR_POLL_DIVISOR = 16
+MIN_POLL = 15 * 60
+RETRY_AFTER_ERROR = HOUR
+# Lewat STALE_FACTOR x interval dari rilis terakhir dianggap hiatus/tamat, ceknya makin jarang
+STALE_FACTOR = 3
+HISTORY_SIZE = 20
+# Jatah komik yang dicek per putaran. Satu cek = satu halaman komik (sering 304 dari
+# cache HTTP) plus paling banyak satu chapter baru, jadi beban per putaran ikut terbatas.
+DEFAULT_COMIC_BUDGET = 20
+DEFAULT_TICK = 5 * 60
+
+def load_schedule():
+    if not os.path.exists(SCHEDULE_FILE):
+        return {}
+    try:
+        with open(SCHEDULE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Jadwal {SCHEDULE_FILE} rusak, mulai dari kosong: {e}")
+        return {}
+
+def save_schedule(schedule):
+    os.makedirs(os.path.dirname(SCHEDULE_FILE), exist_ok=True)
+    temp_path = SCHEDULE_FILE + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(schedule, f, indent=4)
+    os.replace(temp_path, SCHEDULE_FILE)
+
+def add_releases(entry, timestamps):
+    """Gabung waktu rilis baru ke riwayat (urut, maksimal HISTORY_SIZE). Rilis yang jaraknya
+    kurang dari setengah hari dianggap satu (misal tanggal di web vs waktu kita nemu chapternya)."""
+    releases = []
+    for ts in sorted(ts for ts in entry.get("releases", []) + list(timestamps) if ts):
+        if not releases or ts - releases[-1] >= DAY / 2:
+            releases.append(ts)
+    entry["releases"] = releases[-HISTORY_SIZE:]
+
+def release_interval(entry):
+    """Median jarak antar rilis, dibatasi MIN_INTERVAL..MAX_INTERVAL."""
+    releases = entry.get("releases", [])
+    gaps = [b - a for a, b in zip(releases, releases[1:]) if b > a]
+    if not gaps:
+        return DEFAULT_INTERVAL
+    return min(MAX_INTERVAL, max(MIN_INTERVAL, statistics.median(gaps)))
+
+def next_check_at(entry, now):
+    """Kapan komik ini dicek lagi.
+
+    Sebelum perkiraan rilis: tunggu sampe sedikit sebelum perkiraan. Deket/lewat sedikit
+    dari perkiraan: cek sering. Udah lama ga rilis (hiatus/tamat): makin jarang.
+    """
+    releases = entry.get("releases", [])
+    if not releases:
+        return now + DEFAULT_INTERVAL
+    interval = release_interval(entry)
+    expected = releases[-1] + interval
+    window = max(HOUR, interval / 10)
+    if now < expected - window:
+        return expected - window
+    overdue = now - expected
+    if overdue <= (STALE_FACTOR - 1) * interval:
+        return now + max(MIN_POLL, interval / NEAR_POLL_DIVISOR)
+    return now + min(MAX_INTERVAL, max(interval, overdue / 2))
+
+def likelihood(entry, now):
+    """Skor 0..1 seberapa mungkin ada chapter baru sekarang, buat bagi jatah komik per putaran."""
+    releases = entry.get("releases", [])
+    if not releases:
+        return 0.5
+    ratio = (now - releases[-1]) / release_interval(entry)
+    if ratio <= STALE_FACTOR:
+        return min(1.0, ratio)
+    return STALE_FACTOR / ratio
+
+def learn_from_listing(comic_url, entry):
+    """Ambil tanggal rilis dari halaman komik yang barusan di-fetch (dari cache HTTP, tanpa request baru)."""
+    if http_cache.is_unchanged(comic_url, "schedule"):
+        return
+    html = http_cache.cached_body(comic_url)
+    if not html:
+        return
+    dates = scrape_release_dates(make_soup(html, parse_only=CHAPTER_LIST_STRAINER))
+    if dates:
+        add_releases(entry, dates.values())
+    http_cache.mark_seen(comic_url, "schedule")
+
+def sync_schedule(schedule, index_data, now):
+    """Tambahin komik baru dari index.json (langsung dicek), buang yang udah dihapus.
+
+    Riwayat rilis komik baru sengaja kosong: last_updated itu waktu nulis, bukan tanggal
+    rilis. Tanggal rilis diisi dari halaman komik pas cek pertama (learn_from_listing).
+    """
+    for comic_id in list(schedule):
+        if comic_id not in index_data:
+            del schedule[comic_id]
+    for comic_id in index_data:
+        if comic_id not in schedule:
+            schedule[comic_id] = {"releases": [], "next_check": now, "checks": 0, "found": 0}
+
+def due_comics(schedule, now, budget):
+    """Komik yang udah waktunya dicek (priority queue berdasarkan next_check), diurutin
+    dari yang paling mungkin rilis, dipotong sesuai jatah komik."""
+    heap = [(entry.get("next_check", now), comic_id) for comic_id, entry in schedule.items()]
+    heapq.heapify(heap)
+    due = []
+    while heap and heap[0][0] <= now:
+        due.append(heapq.heappop(heap)[1])
+    due.sort(key=lambda comic_id: -likelihood(schedule[comic_id], now))
+    return due[:budget], len(due)
+
+def _check(comic_id, comic_info, entry, overwrite, workers):
+    started = time.time()
+    try:
+        ok, note = update_one(comic_id, comic_info, overwrite=overwrite, workers=workers)
+    except Exception as e:
+        logging.error(f"Komik {comic_id}: Error tak terduga: {e}")
+        ok, note = False, str(e)
+    now = time.time()
+    comic_url = comic_info.get("source_url", f"https://komiku.org/manga/{comic_id}")
+    # Tiap entry cuma dipegang satu thread, jadi ga perlu lock
+    entry["checks"] = entry.get("checks", 0) + 1
+    entry["last_check"] = now
+    if ok:
+        entry["found"] = entry.get("found", 0) + 1
+        add_releases(entry, [started])
+    try:
+        learn_from_listing(comic_url, entry)
+    except Exception as e:
+        logging.warning(f"Komik {comic_id}: Gagal baca tanggal rilis: {e}")
+    if ok or note.startswith("belum ada chapter baru"):
+        entry["next_check"] = next_check_at(entry, now)
+    else:
+        entry["next_check"] = now + RETRY_AFTER_ERROR
+    entry["last_note"] = note
+    return ok, note
+
+def run_once(comic_budget=DEFAULT_COMIC_BUDGET, parallel=1, overwrite=False, workers=DEFAULT_UPLOAD_WORKERS, schedule=None):
+    """Satu putaran: cek komik yang udah jatuh tempo (maksimal comic_budget komik). Balikin jadwalnya."""
+    now = time.time()
+    index_data = read_json(os.path.join(DATA_DIR, "index.json")) or {}
+    schedule = load_schedule() if schedule is None else schedule
+    sync_schedule(schedule, index_data, now)
+    selected, due_total = due_comics(schedule, now, comic_budget)
+    if selected:
+        logging.info(f"Jadwal: {due_total} komik jatuh tempo, cek {len(selected)} (jatah {comic_budget} komik)")
+    with ThreadPoolExecutor(max_workers=max(1, parallel)) as executor:
+        futures = {
+            comic_id: executor.submit(_check, comic_id, index_data[comic_id], schedule[comic_id], overwrite, workers)
+            for comic_id in selected
+        }
+        for comic_id, future in futures.items():
+            ok, note = future.result()
+            entry = schedule[comic_id]
+            logging.info(
+                f"- {comic_id}: {'OK' if ok else 'lewat'} ({note}), interval ~{release_interval(entry) / HOUR:.1f} jam, "
+                f"cek lagi {time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['next_check']))}"
+            )
+    save_schedule(schedule)
+    return schedule
+
+def run_daemon(comic_budget=DEFAULT_COMIC_BUDGET, parallel=1, tick=DEFAULT_TICK, overwrite=False, workers=DEFAULT_UPLOAD_WORKERS):
+    """Loop terus: cek komik yang jatuh tempo, tidur sampe jadwal berikutnya (maksimal tick detik)."""
+    logging.info(f"Daemon jalan (jatah {comic_budget} komik per putaran, tick {tick}s). Ctrl+C buat berhenti.")
+    schedule = None
+    try:
+        while True:
+            schedule = run_once(comic_budget, parallel, overwrite, workers, schedule)
+            # Daemon ga pernah "selesai", jadi metrik ditulis tiap putaran (kumulatif sejak start)
+            metrics.write_outputs("daemon")
+            upcoming = min((entry["next_check"] for entry in schedule.values()), default=time.time() + tick)
+            time.sleep(min(tick, max(1, upcoming - time.time())))
+    except KeyboardInterrupt:
+        logging.info("Daemon berhenti, bro!")
+        if schedule is not None:
+            save_schedule(schedule)
@@ -1,16 +1,48 @@
 import logging
 import re
-import requests
-from bs4 import BeautifulSoup
+import threading
+import time
+import metrics
+import selector_cache
+from bs4 import BeautifulSoup, SoupStrainer
 from urllib.parse import urljoin, urlparse
-from utils import fetch_page, paraphrase_synopsis
+from chapter_index import chapter_key, chapter_number
+from utils import fetch_page, paraphrase_synopsis, settings
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-    "Accept-Language": "en-US,en;q=0.5",
-    "Referer": "https://komiku.org/"
-}
+try:
+    import lxml  # noqa: F401
+    DEFAULT_PARSER = "lxml"
+except ImportError:
+    DEFAULT_PARSER = "html.parser"
+
+# Parser bisa dipilih lewat config.ini ([Scraper] Parser = lxml / html.parser / html5lib),
+# dibaca pas parse pertama, bukan pas import
+# Strainer cuma buat selector yang hasilnya dijamin sama walau yang di-parse cuma bagian ini
+CHAPTER_LIST_STRAINER = SoupStrainer("table")
+CHAPTER_IMAGES_STRAINER = SoupStrainer("div", id="Baca_Komik")
+
+_parse_lock = threading.Lock()
+_parse_stats = {}
+
+def make_soup(html, parse_only=None, parser=None):
+    """BeautifulSoup pake parser yang dipilih, waktu parse-nya dicatat per parser."""
+    parser = parser or settings().HTML_PARSER or DEFAULT_PARSER
+    started = time.perf_counter()
+    soup = BeautifulSoup(html, parser, parse_only=parse_only)
+    elapsed = time.perf_counter() - started
+    label = parser if parse_only is None else f"{parser}+strainer"
+    with _parse_lock:
+        stats = _parse_stats.setdefault(label, {"count": 0, "seconds": 0.0, "bytes": 0})
+        stats["count"] += 1
+        stats["seconds"] += elapsed
+        stats["bytes"] += len(html)
+    metrics.observe("parse", elapsed)
+    metrics.add_bytes("parse", len(html))
+    return soup
+
+def parse_stats():
+    with _parse_lock:
+        return {label: dict(stats, seconds=round(stats["seconds"], 4)) for label, stats in _parse_stats.items()}
 
 def get_comic_id_and_display_name(url):
     path = urlparse(url).path
@@ -21,6 +53,7 @@ def get_comic_id_and_display_name(url):
     return comic_id, display_name
 
 def scrape_komiku_details(url, soup):
+    host = urlparse(url).hostname or ""
     title_element = soup.find("h1")
     title = title_element.text.strip().replace("Komik ", "").strip() if title_element else "Unknown Title"
     logging.info(f"Nama komik dari <h1>: {title}")
@@ -32,7 +65,10 @@ def scrape_komiku_details(url, soup):
         (soup.find, "div", {"class": "komik_info-content-meta"}, lambda x: x.find("span", string=lambda t: "Author" in t if t else False)),
         (soup.find_all, "span", {}, lambda x: x if "Author" in x.text else None)
     ]
-    for find_method, tag, attrs, next_step in selectors:
+    # Scan semua <span> itu catch-all, jangan sampe diinget sebagai selector utama
+    generic = {len(selectors) - 1}
+    matched = None
+    for position, (find_method, tag, attrs, next_step) in selector_cache.ordered(host, "author", selectors, generic):
         element = find_method(tag, **attrs) if attrs else find_method(tag)
         if element:
             if isinstance(element, list):
@@ -40,7 +76,10 @@ def scrape_komiku_details(url, soup):
                     next_text = span.find_next_sibling(text=True)
                     if next_text and next_text.strip():
                         author = next_text.strip()
+                        matched = position
                         break
+                if matched is not None:
+                    break
             else:
                 next_element = next_step(element)
                 if next_element:
@@ -49,11 +88,14 @@ def scrape_komiku_details(url, soup):
                     else:
                         author = next_element.text.strip()
                     if author and author != "Unknown Author":
+                        matched = position
                         break
                 elif element.find_next_sibling(text=True):
                     author = element.find_next_sibling(text=True).strip()
                     if author and author != "Unknown Author":
+                        matched = position
                         break
+    selector_cache.record(host, "author", selectors, matched, generic)
     author = author.replace("~", "").strip() if author else "Unknown Author"
     logging.info(f"Author ditemukan: {author}")
     genre = "Fantasy"
@@ -63,7 +105,8 @@ def scrape_komiku_details(url, soup):
         (soup.find, "td", {"string": lambda x: "Genre" in x if x else False}, lambda x: x.find_next("td")),
         (soup.find, "div", {"class": "komik_info-content-genre"}, lambda x: x)
     ]
-    for find_method, tag, attrs, next_step in genre_selectors:
+    matched = None
+    for position, (find_method, tag, attrs, next_step) in selector_cache.ordered(host, "genre", genre_selectors):
         element = find_method(tag, **attrs)
         if element:
             next_element = next_step(element)
@@ -73,7 +116,9 @@ def scrape_komiku_details(url, soup):
                 else:
                     genre = next_element.text.strip()
                 if genre:
+                    matched = position
                     break
+    selector_cache.record(host, "genre", genre_selectors, matched)
     logging.info(f"Genre ditemukan: {genre}")
     comic_type = "Manhua"
     type_selectors = [
@@ -82,7 +127,8 @@ def scrape_komiku_details(url, soup):
         (soup.find, "td", {"string": lambda x: "Type" in x if x else False}, lambda x: x.find_next("td")),
         (soup.find, "div", {"class": "komik_info-content-meta"}, lambda x: x.find("span", string=lambda t: "Type" in t if t else False))
     ]
-    for find_method, tag, attrs, next_step in type_selectors:
+    matched = None
+    for position, (find_method, tag, attrs, next_step) in selector_cache.ordered(host, "type", type_selectors):
         element = find_method(tag, **attrs)
         if element:
             next_element = next_step(element)
@@ -92,11 +138,14 @@ def scrape_komiku_details(url, soup):
                 else:
                     comic_type = next_element.text.strip()
                 if comic_type:
+                    matched = position
                     break
             elif element.find_next_sibling(text=True):
                 comic_type = element.find_next_sibling(text=True).strip()
                 if comic_type:
+                    matched = position
                     break
+    selector_cache.record(host, "type", type_selectors, matched)
     logging.info(f"Tipe komik ditemukan: {comic_type}")
     synopsis = "No synopsis available."
     synopsis_header = soup.find("h2", string=lambda t: "Sinopsis Lengkap" in t if t else False)
@@ -121,37 +170,60 @@ def scrape_komiku_details(url, soup):
         'meta[itemprop="image"]',
         'img[itemprop="image"]'
     ]
-    for selector in cover_selectors:
+    matched = None
+    for position, selector in selector_cache.ordered(host, "cover", cover_selectors):
         cover_element = soup.select_one(selector)
         if cover_element and cover_element.get("content"):
             cover_url = cover_element["content"]
+            matched = position
             break
         elif cover_element and cover_element.get("src"):
             cover_url = cover_element["src"]
+            matched = position
             break
+    selector_cache.record(host, "cover", cover_selectors, matched)
     if not cover_url:
         logging.warning("Cover image tidak ditemukan.")
     logging.info(f"Scraped data: title={title}, author={author}, genre={genre}, type={comic_type}, synopsis={synopsis}, cover={cover_url}")
     return title, author, synopsis, cover_url, soup, genre, comic_type
 
 def scrape_comic_details(url):
-    html = fetch_page(url)
+    html = fetch_page(url, cache=True)
     if not html:
         return None, None, None, None, None, None, None
-    soup = BeautifulSoup(html, "html.parser")
+    soup = make_soup(html)
     return scrape_komiku_details(url, soup)
 
-def scrape_chapter_list(url, soup):
+# Selector utama dan fallback; dua yang pertama cuma butuh isi <table>
+CHAPTER_LIST_SELECTORS = [
+    'td.judulseries a',
+    'table tr a:has(span)',
+    'a[href*="-chapter-"]',
+    'div.bxcl ul li a'
+]
+TABLE_SELECTOR_COUNT = 2
+# Posisi selector catch-all: cocok sama link apa aja yang ada "-chapter-"-nya
+# (termasuk navigasi/rekomendasi), jadi selalu dicoba terakhir dan ga pernah diinget
+CHAPTER_LIST_GENERIC = {2}
+
+def parse_chapter_list(url, html):
+    """Parse daftar chapter dari HTML mentah.
+
+    Coba dulu parse <table> doang (selector tabel hasilnya sama persis kayak parse penuh),
+    baru parse seluruh halaman kalo tabelnya ga ketemu.
+    """
+    soup = make_soup(html, parse_only=CHAPTER_LIST_STRAINER)
+    chapters = scrape_chapter_list(url, soup, CHAPTER_LIST_SELECTORS[:TABLE_SELECTOR_COUNT], warn=False)
+    if chapters:
+        return chapters
+    return scrape_chapter_list(url, make_soup(html))
+
+def scrape_chapter_list(url, soup, selectors=CHAPTER_LIST_SELECTORS, warn=True):
     chapters = {}
+    host = urlparse(url).hostname or ""
     logging.info(f"Mencari daftar chapter dari {url}...")
-    # Selector utama dan fallback
-    selectors = [
-        'td.judulseries a',
-        'table tr a:has(span)',
-        'a[href*="-chapter-"]',
-        'div.bxcl ul li a'
-    ]
-    for selector in selectors:
+    matched = None
+    for position, selector in selector_cache.ordered(host, "chapter_list", selectors, CHAPTER_LIST_GENERIC):
         chapter_elements = soup.select(selector)
         if chapter_elements:
             logging.info(f"Chapter ditemukan dengan selector: {selector}")
@@ -165,22 +237,47 @@ def scrape_chapter_list(url, soup):
                 # Regex untuk tangkap integer atau desimal (misal 1, 1.1, 302.5)
                 match = re.search(r'Chapter\s+(\d+(\.\d+)?)', chapter_text, re.IGNORECASE)
                 if match:
-                    chapter_num = float(match.group(1))
-                    chapter_num = int(chapter_num) if chapter_num.is_integer() else chapter_num
-                    chapters[str(chapter_num)] = href
+                    chapter_num = chapter_number(match.group(1))
+                    chapters[chapter_key(chapter_num)] = href
                     logging.debug(f"Chapter {chapter_num}: {href}")
             if chapters:
+                matched = position
                 break
-    if not chapters:
+    if matched is not None or warn:
+        selector_cache.record(host, "chapter_list", selectors, matched, CHAPTER_LIST_GENERIC)
+    if not chapters and warn:
         logging.warning(f"Tidak ditemukan chapter di {url}. HTML mungkin berubah.")
     return chapters
 
+RELEASE_DATE_FORMATS = ("%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d")
+
+def scrape_release_dates(soup):
+    """Tanggal rilis per chapter dari tabel daftar chapter (td.tanggalseries).
+    Balikin {key chapter: timestamp}; baris yang tanggalnya ga kebaca dilewati."""
+    dates = {}
+    for row in soup.select("tr"):
+        link = row.select_one("td.judulseries a")
+        date_cell = row.select_one("td.tanggalseries")
+        if not link or not date_cell:
+            continue
+        match = re.search(r'Chapter\s+(\d+(\.\d+)?)', link.get_text(" ", strip=True), re.IGNORECASE)
+        if not match:
+            continue
+        text = date_cell.get_text(strip=True)
+        for date_format in RELEASE_DATE_FORMATS:
+            try:
+                dates[chapter_key(match.group(1))] = time.mktime(time.strptime(text, date_format))
+                break
+            except ValueError:
+                continue
+    return dates
+
 def scrape_chapter_images(chapter_url):
     full_url = urljoin("https://komiku.org", chapter_url)
     html = fetch_page(full_url)
     if not html:
         return []
-    soup = BeautifulSoup(html, "html.parser")
+    soup = make_soup(html)
     title_element = soup.find("h1")
     chapter_title = title_element.text.strip() if title_element else "Unknown Chapter"
     logging.info(f"Judul chapter: {chapter_title}")
@@ -191,7 +288,8 @@ def scrape_chapter_images(chapter_url):
         'div.komik img',
         'img[src*="img.komiku.org"]'
     ]
-    for selector in selectors:
+    host = urlparse(full_url).hostname or ""
+    for position, selector in selector_cache.ordered(host, "chapter_images", selectors):
         image_elements = soup.select(selector)
         if image_elements:
             for img in image_elements:
@@ -199,6 +297,7 @@ def scrape_chapter_images(chapter_url):
                 if src and src.startswith("http"):
                     image_urls.append(src)
             break
+    selector_cache.record(host, "chapter_images", selectors, position if image_urls else None)
     if not image_urls:
         logging.error(f"Tidak ada gambar untuk chapter ini: {chapter_url}")
     return image_urls
\ No newline at end of file
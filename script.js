@@ -1,2 +1,39 @@
-// script.js: Fungsi umum untuk index.html, comic.html, chapter.html
-// Kosong untuk sekarang, bisa ditambah utilitas JSON kalau perlu
\ No newline at end of file
+// script.js: Fungsi umum untuk index.html, genre.html, comic.html, chapter.html
+
+// Data hasil publish.py (minified, bisa compact) ada di public/data/, kalo belum ada pake data/ mentah
+function loadData(path) {
+    return fetch(`public/data/${path}`)
+        .then(res => res.ok ? res : fetch(`data/${path}`))
+        .then(res => {
+            if (!res.ok) throw new Error(`Failed to load ${path}`);
+            return res.json();
+        })
+        .then(expandData);
+}
+
+// Kebalikan publish.factor_urls: {template, values} -> daftar URL lengkap
+function expandUrls(value) {
+    if (Array.isArray(value)) return value;
+    const template = value.template.split('/');
+    return value.values.map(item => {
+        const parts = item.split('/');
+        let next = 0;
+        return template.map(segment => segment === '{}' ? parts[next++] : segment).join('/');
+    });
+}
+
+function expandChapter(chapter) {
+    ['images', 'pages'].forEach(key => {
+        if (chapter && chapter[key]) chapter[key] = expandUrls(chapter[key]);
+    });
+    return chapter;
+}
+
+function expandData(data) {
+    if (data && data.chapters) {
+        Object.values(data.chapters).forEach(expandChapter);
+    } else {
+        expandChapter(data);
+    }
+    return data;
+}
@@ -0,0 +1,99 @@
+import atexit
+import json
+import logging
+import os
+import threading
+
+# Inget selector mana yang terakhir berhasil per host + per field (author, genre,
+# chapter_list, ...) biar dicoba duluan di run berikutnya. Kalo selector itu gagal,
+# rantai fallback lengkap tetap dicoba urut aslinya. Selector generic (catch-all yang
+# hampir selalu cocok) ga pernah diinget dan selalu dicoba paling akhir, biar satu
+# halaman aneh ga bikin selector spesifiknya ga pernah dicoba lagi.
+SELECTOR_CACHE_FILE = os.path.join("cache", "selector_cache.json")
+
+_lock = threading.Lock()
+_cache = None
+_dirty = False
+
+def _load():
+    global _cache
+    if _cache is None:
+        _cache = {}
+        if os.path.exists(SELECTOR_CACHE_FILE):
+            try:
+                with open(SELECTOR_CACHE_FILE, "r", encoding="utf-8") as f:
+                    _cache = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Cache selector {SELECTOR_CACHE_FILE} rusak, mulai dari kosong: {e}")
+    return _cache
+
+def _selector_key(selectors, position):
+    """Identitas selector: string CSS-nya, atau posisi + tag buat selector berupa tuple."""
+    selector = selectors[position]
+    if isinstance(selector, str):
+        return selector
+    return f"{position}:{selector[1]}"
+
+def ordered(host, field, selectors, generic=()):
+    """List (posisi, selector) dengan selector yang terakhir berhasil di depan.
+
+    generic: posisi selector catch-all, selalu ditaruh paling belakang (urut aslinya).
+    """
+    order = [position for position in range(len(selectors)) if position not in generic]
+    with _lock:
+        entry = _load().get(host, {}).get(field, {})
+    preferred = entry.get("index")
+    if preferred in order and entry.get("key") == _selector_key(selectors, preferred):
+        order.remove(preferred)
+        order.insert(0, preferred)
+    order += [position for position in range(len(selectors)) if position in generic]
+    return [(position, selectors[position]) for position in order]
+
+def record(host, field, selectors, position, generic=()):
+    """Catat hasil satu rantai selector. position=None kalo semua selector gagal.
+    Yang berhasil selector generic cuma dihitung, selector yang diinget ga diganti."""
+    global _dirty
+    with _lock:
+        entry = _load().setdefault(host, {}).setdefault(field, {"hits": 0, "misses": 0, "failures": 0})
+        if position is None:
+            entry["failures"] += 1
+        elif position in generic:
+            entry["fallbacks"] = entry.get("fallbacks", 0) + 1
+        elif entry.get("index") == position and entry.get("key") == _selector_key(selectors, position):
+            entry["hits"] += 1
+        else:
+            entry["misses"] += 1
+            entry["index"] = position
+            entry["key"] = _selector_key(selectors, position)
+        _dirty = True
+
+def save():
+    global _dirty
+    with _lock:
+        if not _dirty or _cache is None:
+            return
+        os.makedirs(os.path.dirname(SELECTOR_CACHE_FILE), exist_ok=True)
+        temp_path = SELECTOR_CACHE_FILE + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(_cache, f, indent=4)
+        os.replace(temp_path, SELECTOR_CACHE_FILE)
+        _dirty = False
+
+def stats():
+    """Ringkasan per host/field: selector yang dipake dan hit rate-nya."""
+    with _lock:
+        result = {}
+        for host, fields in _load().items():
+            for field, entry in fields.items():
+                tried = entry.get("hits", 0) + entry.get("misses", 0)
+                result[f"{host}/{field}"] = {
+                    "selector": entry.get("key"),
+                    "hits": entry.get("hits", 0),
+                    "misses": entry.get("misses", 0),
+                    "failures": entry.get("failures", 0),
+                    "fallbacks": entry.get("fallbacks", 0),
+                    "hit_rate": round(entry.get("hits", 0) / tried, 3) if tried else 0.0,
+                }
+        return result
+
+atexit.register(save)
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import image_index
+from chapter_index import ChapterIndex, normalize_chapters
+from utils import read_json, write_json, append_json, modify_json, settings, DATA_DIR
+
+# Layout "single": semua chapter + gambar di data/<comic>.json (format lama).
+# Layout "sharded": data/<comic>.json cuma manifest (metadata + daftar chapter),
+# gambar tiap chapter ada di data/<comic>/<chapter>.json.
+LAYOUT_SINGLE = "single"
+LAYOUT_SHARDED = "sharded"
+IMAGE_KEYS = ("images", "pages")
+# Ukuran + URL varian per halaman (dari image_optimize), cuma disimpen di record chapter lengkap
+IMAGE_META_KEY = "image_meta"
+
+def comic_path(comic_id):
+    return os.path.join(DATA_DIR, f"{comic_id}.json")
+
+def chapter_dir(comic_id):
+    return os.path.join(DATA_DIR, comic_id)
+
+def chapter_path(comic_id, chapter_key):
+    return os.path.join(chapter_dir(comic_id), f"{chapter_key}.json")
+
+def is_sharded(comic_data):
+    return comic_data.get("layout") == LAYOUT_SHARDED
+
+def chapter_summary(chapter):
+    """Entry chapter buat manifest: semua field kecuali daftar gambar."""
+    summary = {key: value for key, value in chapter.items() if key not in IMAGE_KEYS and key != IMAGE_META_KEY}
+    for key in IMAGE_KEYS:
+        if key in chapter:
+            summary["total_pages"] = len(chapter[key])
+    return summary
+
+def read_comic(comic_id, with_images=True):
+    """Baca data komik. Kalo sharded dan with_images=False, cuma manifest yang dibaca."""
+    comic_data = read_json(comic_path(comic_id))
+    if not comic_data or not is_sharded(comic_data) or not with_images:
+        return comic_data
+    chapters = {}
+    for key, summary in comic_data.get("chapters", {}).items():
+        chapters[key] = read_json(chapter_path(comic_id, key)) or dict(summary)
+    comic_data["chapters"] = chapters
+    return comic_data
+
+def read_chapter(comic_id, comic_data, chapter_key):
+    """Ambil record lengkap satu chapter (termasuk gambar), {} kalo ga ada."""
+    if chapter_key not in comic_data.get("chapters", {}):
+        return {}
+    if is_sharded(comic_data):
+        return read_json(chapter_path(comic_id, chapter_key)) or {}
+    return comic_data["chapters"][chapter_key]
+
+def write_comic(comic_id, comic_data, changed=None, removed=()):
+    """Simpan data komik sesuai layout-nya.
+
+    changed=None berarti tulis ulang semuanya. Kalo changed dikasih, layout single
+    cuma nambah entry ke journal, layout sharded cuma nulis ulang file chapter di
+    `changed` + manifest (chapter lain di comic_data boleh berupa summary).
+    removed = key chapter yang udah dibuang dari comic_data.
+    """
+    if not is_sharded(comic_data):
+        chapters = comic_data.get("chapters", {})
+        # Komik baru belum punya file utama, journal butuh base file buat di-replay;
+        # chapter yang dihapus juga ga bisa dicatat journal, jadi tulis full
+        if changed is None or removed or not os.path.exists(comic_path(comic_id)):
+            write_json(comic_path(comic_id), comic_data)
+        else:
+            # Cuma chapter yang berubah + metadata yang dicatat ke journal
+            fields = {key: value for key, value in comic_data.items() if key != "chapters"}
+            append_json(comic_path(comic_id), fields, {key: chapters[key] for key in changed if key in chapters})
+        image_index.safe_index_comic(comic_id, comic_data, changed, removed)
+        return
+    chapters = comic_data.get("chapters", {})
+    keys = chapters.keys() if changed is None else [key for key in changed if key in chapters]
+    if keys:
+        os.makedirs(chapter_dir(comic_id), exist_ok=True)
+    for key in keys:
+        write_json(chapter_path(comic_id, key), chapters[key])
+    # Manifest ditulis terakhir biar ga pernah nunjuk ke file chapter yang belum ada
+    manifest = dict(comic_data, chapters={key: chapter_summary(chapter) for key, chapter in chapters.items()})
+    write_json(comic_path(comic_id), manifest)
+    for key in removed:
+        if key not in chapters and os.path.exists(chapter_path(comic_id, key)):
+            os.remove(chapter_path(comic_id, key))
+    image_index.safe_index_comic(comic_id, comic_data, changed, removed)
+
+def comic_summary(comic_data):
+    """Field ringkasan buat index.json: chapter terakhir, jumlah chapter, waktu update, checksum.
+
+    Checksum dihitung dari summary chapter (judul, url, jumlah halaman), jadi cukup dari manifest.
+    """
+    chapters = comic_data.get("chapters", {})
+    latest = ChapterIndex(chapters.keys()).latest()
+    summaries = {key: chapter_summary(chapter) for key, chapter in chapters.items()}
+    checksum = hashlib.sha256(json.dumps(summaries, sort_keys=True).encode("utf-8")).hexdigest()
+    return {
+        "total_chapters": len(chapters),
+        "latest_chapter": latest,
+        "last_updated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "checksum": checksum,
+    }
+
+def update_summary(comic_id, comic_data):
+    """Tulis ringkasan komik ke index.json, cuma kalo ada yang beda.
+
+    last_updated dipertahanin selama chapter-nya ga berubah (checksum + latest_chapter sama),
+    jadi poll yang ga nemu apa-apa ga keliatan kayak rilis baru buat scheduler.
+    Balikin True kalo index.json ditulis.
+    """
+    summary = comic_summary(comic_data)
+    def apply(index_data):
+        current = index_data.get(comic_id)
+        if current is None:
+            return False
+        unchanged = current.get("checksum") == summary["checksum"] and current.get("latest_chapter") == summary["latest_chapter"]
+        if unchanged and current.get("last_updated"):
+            summary["last_updated"] = current["last_updated"]
+        if all(current.get(key) == value for key, value in summary.items()):
+            return False
+        current.update(summary)
+        return True
+    return modify_json(os.path.join(DATA_DIR, "index.json"), apply)
+
+def refresh_index(comic_id):
+    """Hitung ulang field ringkasan komik di index.json dari manifest/file komiknya."""
+    comic_data = read_comic(comic_id, with_images=False)
+    if not comic_data:
+        logging.error(f"File {comic_path(comic_id)} ga ada, bro!")
+        return False
+    return update_summary(comic_id, comic_data)
+
+def normalize_comic(comic_id):
+    """Normalisasi key chapter satu komik ("1.0" -> "1"), sekali jalan buat data lama."""
+    comic_data = read_comic(comic_id)
+    if not comic_data:
+        logging.error(f"File {comic_path(comic_id)} ga ada, bro!")
+        return 0
+    old_keys = list(comic_data.get("chapters", {}))
+    chapters, renamed = normalize_chapters(comic_data.get("chapters", {}))
+    if not renamed and list(chapters) == old_keys:
+        return 0
+    comic_data["chapters"] = chapters
+    comic_data["total_chapters"] = len(chapters)
+    write_comic(comic_id, comic_data, removed=[key for key in old_keys if key not in chapters])
+    refresh_index(comic_id)
+    logging.info(f"Komik {comic_id}: {renamed} key chapter dinormalisasi, total {len(chapters)} chapter")
+    return renamed
+
+def new_comic_layout():
+    return LAYOUT_SHARDED if settings().DATA_LAYOUT == LAYOUT_SHARDED else LAYOUT_SINGLE
+
+def migrate_comic(comic_id, layout=LAYOUT_SHARDED):
+    """Pindahin satu komik ke layout lain. Balikin True kalo ada yang berubah."""
+    comic_data = read_comic(comic_id)
+    if not comic_data:
+        logging.error(f"File {comic_path(comic_id)} ga ada, bro!")
+        return False
+    current = comic_data.get("layout", LAYOUT_SINGLE)
+    if current == layout:
+        logging.info(f"Komik {comic_id} udah pake layout {layout}, lewati.")
+        return False
+    if layout == LAYOUT_SHARDED:
+        comic_data["layout"] = LAYOUT_SHARDED
+        write_comic(comic_id, comic_data)
+    else:
+        comic_data.pop("layout", None)
+        write_comic(comic_id, comic_data)
+        shutil.rmtree(chapter_dir(comic_id), ignore_errors=True)
+    logging.info(f"Komik {comic_id}: layout {current} -> {layout} ({len(comic_data.get('chapters', {}))} chapter)")
+    return True
+
+def migrate_all(layout=LAYOUT_SHARDED):
+    index_data = read_json(os.path.join(DATA_DIR, "index.json")) or {}
+    migrated = [comic_id for comic_id in index_data if migrate_comic(comic_id, layout)]
+    logging.info(f"Migrasi layout {layout} selesai: {len(migrated)} komik berubah")
+    return migrated
@@ -0,0 +1,277 @@
+import json
+import logging
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+# Queue tugas (add_comic / update_comic) di SQLite biar tahan crash dan bisa dikerjain
+# beberapa worker/proses barengan. Tugas yang lagi jalan dipegang pake lease; kalo
+# worker-nya mati, lease-nya habis dan tugas diambil worker lain.
+QUEUE_DB_FILE = "queue.db"
+LEASE_SECONDS = 30 * 60
+HEARTBEAT_SECONDS = 60
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 6 * 3600
+DEFAULT_PRIORITY = {"add_comic": 10, "update_comic": 0}
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    dedupe_key TEXT NOT NULL,
+    comic TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    run_after REAL NOT NULL,
+    lease_owner TEXT,
+    lease_until REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS tasks_active_dedupe ON tasks(dedupe_key) WHERE status IN ('pending', 'running');
+CREATE INDEX IF NOT EXISTS tasks_ready ON tasks(status, priority, run_after);
+"""
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = set()
+
+def _connect(db_file=None):
+    """Koneksi SQLite per thread (autocommit, transaksi diatur manual)."""
+    db_file = db_file or QUEUE_DB_FILE
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(db_file)
+    if conn is None:
+        conn = sqlite3.connect(db_file, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with _init_lock:
+            if db_file not in _initialized:
+                conn.executescript(SCHEMA)
+                _initialized.add(db_file)
+        connections[db_file] = conn
+    return conn
+
+def _comic_key(url):
+    return url.rstrip("/").split("/")[-1].lower() if url else None
+
+def dedupe_key(kind, payload):
+    """Tugas yang identik (jenis, komik, range chapter, overwrite) dapet key yang sama."""
+    parts = [kind, _comic_key(payload.get("url", "")) or ""]
+    if kind == "update_comic":
+        parts += [f"{float(payload.get('start', 1.0)):g}", f"{float(payload.get('end', payload.get('start', 1.0))):g}",
+                  "overwrite" if payload.get("overwrite") else ""]
+    return "|".join(parts)
+
+def enqueue(kind, payload, priority=None, max_attempts=MAX_ATTEMPTS, run_after=None, db_file=None):
+    """Masukin tugas. Balikin id tugas baru, atau None kalo tugas yang sama masih antri/jalan
+    (prioritasnya dinaikin kalo yang baru lebih tinggi)."""
+    now = time.time()
+    priority = DEFAULT_PRIORITY.get(kind, 0) if priority is None else priority
+    key = dedupe_key(kind, payload)
+    conn = _connect(db_file)
+    cursor = conn.execute(
+        "INSERT OR IGNORE INTO tasks (kind, payload, dedupe_key, comic, priority, max_attempts, run_after, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (kind, json.dumps(payload), key, _comic_key(payload.get("url")), priority, max_attempts, run_after or now, now, now),
+    )
+    if cursor.rowcount:
+        return cursor.lastrowid
+    conn.execute(
+        "UPDATE tasks SET priority = ?, updated_at = ? WHERE dedupe_key = ? AND status IN (?, ?) AND priority < ?",
+        (priority, now, key, PENDING, RUNNING, priority),
+    )
+    return None
+
+def claim(owner, lease_seconds=LEASE_SECONDS, db_file=None):
+    """Ambil satu tugas yang siap (prioritas tertinggi dulu) dan pegang lease-nya.
+
+    Tugas yang lease-nya udah habis (worker-nya mati) ikut diambil lagi. Komik yang
+    lagi dikerjain worker lain dilewati biar file JSON-nya ga ditulis barengan.
+    """
+    conn = _connect(db_file)
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT * FROM tasks WHERE ((status = ? AND run_after <= ?) OR (status = ? AND lease_until < ?)) "
+            "AND (comic IS NULL OR comic NOT IN (SELECT comic FROM tasks WHERE status = ? AND lease_until >= ? AND comic IS NOT NULL)) "
+            "ORDER BY priority DESC, run_after, id LIMIT 1",
+            (PENDING, now, RUNNING, now, RUNNING, now),
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        conn.execute(
+            "UPDATE tasks SET status = ?, lease_owner = ?, lease_until = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+            (RUNNING, owner, now + lease_seconds, now, row["id"]),
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    task = dict(row)
+    task["attempts"] += 1
+    task["payload"] = json.loads(task["payload"])
+    return task
+
+def heartbeat(task_id, owner, lease_seconds=LEASE_SECONDS, db_file=None):
+    """Perpanjang lease. Balikin False kalo lease-nya udah diambil worker lain."""
+    cursor = _connect(db_file).execute(
+        "UPDATE tasks SET lease_until = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+        (time.time() + lease_seconds, task_id, RUNNING, owner),
+    )
+    return cursor.rowcount == 1
+
+def complete(task_id, owner, db_file=None):
+    _connect(db_file).execute(
+        "UPDATE tasks SET status = ?, lease_owner = NULL, lease_until = NULL, last_error = NULL, updated_at = ? "
+        "WHERE id = ? AND lease_owner = ?",
+        (DONE, time.time(), task_id, owner),
+    )
+
+def retry_delay(attempts):
+    """Exponential backoff (60s, 2m, 4m, ...) dengan jitter, maksimal RETRY_MAX_SECONDS."""
+    delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.5, 1.0)
+
+def fail(task_id, owner, error, db_file=None):
+    """Tandai gagal: dijadwal ulang pake backoff, atau FAILED kalo percobaannya udah habis.
+    Balikin status barunya."""
+    conn = _connect(db_file)
+    row = conn.execute("SELECT attempts, max_attempts FROM tasks WHERE id = ? AND lease_owner = ?", (task_id, owner)).fetchone()
+    if row is None:
+        return None
+    now = time.time()
+    status = FAILED if row["attempts"] >= row["max_attempts"] else PENDING
+    conn.execute(
+        "UPDATE tasks SET status = ?, run_after = ?, lease_owner = NULL, lease_until = NULL, last_error = ?, updated_at = ? WHERE id = ?",
+        (status, now + retry_delay(row["attempts"]), str(error)[:1000], now, task_id),
+    )
+    return status
+
+def retry_failed(db_file=None):
+    """Balikin tugas FAILED ke antrian (percobaan direset)."""
+    cursor = _connect(db_file).execute(
+        "UPDATE tasks SET status = ?, attempts = 0, run_after = ?, updated_at = ? "
+        "WHERE id IN (SELECT MAX(id) FROM tasks WHERE status = ? GROUP BY dedupe_key) "
+        "AND dedupe_key NOT IN (SELECT dedupe_key FROM tasks WHERE status IN (?, ?))",
+        (PENDING, time.time(), time.time(), FAILED, PENDING, RUNNING),
+    )
+    return cursor.rowcount
+
+def purge_done(older_than=7 * 24 * 3600, db_file=None):
+    cursor = _connect(db_file).execute("DELETE FROM tasks WHERE status = ? AND updated_at < ?", (DONE, time.time() - older_than))
+    return cursor.rowcount
+
+def stats(db_file=None):
+    rows = _connect(db_file).execute("SELECT status, COUNT(*) AS total FROM tasks GROUP BY status").fetchall()
+    result = {status: 0 for status in (PENDING, RUNNING, DONE, FAILED)}
+    result.update({row["status"]: row["total"] for row in rows})
+    return result
+
+def list_tasks(status=None, limit=50, db_file=None):
+    query = "SELECT id, kind, payload, priority, status, attempts, run_after, last_error FROM tasks"
+    params = ()
+    if status:
+        query += " WHERE status = ?"
+        params = (status,)
+    query += " ORDER BY priority DESC, run_after, id LIMIT ?"
+    return [dict(row) for row in _connect(db_file).execute(query, params + (limit,)).fetchall()]
+
+def _read_entries(path):
+    """Isi queue.json (list) atau file .jsonl (satu tugas per baris)."""
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    if path.endswith(".jsonl"):
+        entries = []
+        for line_number, line in enumerate(content.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError as e:
+                logging.warning(f"{path} baris {line_number} rusak, lewati: {e}")
+        return entries
+    entries = json.loads(content) if content.strip() else []
+    return entries if isinstance(entries, list) else [entries]
+
+def import_file(path, db_file=None):
+    """Import tugas dari queue.json / *.jsonl. Balikin (ditambah, dobel, dilewati).
+    Raise ValueError kalo file-nya ga bisa di-parse."""
+    added = duplicates = skipped = 0
+    for entry in _read_entries(path):
+        if not isinstance(entry, dict) or entry.get("task") not in DEFAULT_PRIORITY or not entry.get("url"):
+            skipped += 1
+            continue
+        payload = {key: value for key, value in entry.items() if key not in ("task", "priority")}
+        if enqueue(entry["task"], payload, priority=entry.get("priority"), db_file=db_file):
+            added += 1
+        else:
+            duplicates += 1
+    return added, duplicates, skipped
+
+def new_owner():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def _keep_alive(task_id, owner, stop, lease_seconds, db_file):
+    while not stop.wait(HEARTBEAT_SECONDS):
+        if not heartbeat(task_id, owner, lease_seconds, db_file):
+            logging.warning(f"Lease tugas {task_id} udah lepas dari {owner}")
+            return
+
+def work(handlers, budget=None, lease_seconds=LEASE_SECONDS, db_file=None, on_event=None):
+    """Loop satu worker: ambil tugas, jalanin handler-nya, catat hasil. Berhenti kalo
+    ga ada tugas yang siap atau jatahnya habis. Balikin (berhasil, gagal).
+
+    handlers = {kind: fungsi(payload)}; handler yang balikin False atau raise dihitung gagal.
+    budget = objek take(n)/refund(n) yang dibagi antar worker (misal budget.ChapterBudget).
+    on_event(event, task, detail) dipanggil buat log status.
+    """
+    owner = new_owner()
+    on_event = on_event or (lambda event, task, detail: None)
+    succeeded = failed = 0
+    while budget is None or budget.take(1):
+        task = claim(owner, lease_seconds, db_file)
+        if task is None:
+            if budget is not None:
+                budget.refund(1)
+            break
+        on_event("start", task, owner)
+        stop = threading.Event()
+        keeper = threading.Thread(target=_keep_alive, args=(task["id"], owner, stop, lease_seconds, db_file), daemon=True)
+        keeper.start()
+        try:
+            handler = handlers.get(task["kind"])
+            if handler is None:
+                raise ValueError(f"Jenis tugas ga dikenal: {task['kind']}")
+            if handler(task["payload"]) is False:
+                raise RuntimeError("handler balikin False")
+            complete(task["id"], owner, db_file)
+            succeeded += 1
+            on_event("done", task, None)
+        except Exception as e:
+            status = fail(task["id"], owner, e, db_file)
+            failed += 1
+            on_event("retry" if status == PENDING else "failed", task, e)
+        finally:
+            stop.set()
+            keeper.join()
+    return succeeded, failed
@@ -0,0 +1,28 @@
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modul berat yang baru boleh ke-import pas command yang butuh jalan
+FORBIDDEN_MODULES = ("bs4", "lxml", "requests", "cloudinary", "PIL")
+STARTUP_DIRS = ("data", "logs", "temp_images", "cache")
+TIMEOUT = 120
+
+def _python(code, cwd):
+    """Jalanin code di interpreter baru dari direktori kosong (tanpa config.ini)."""
+    prelude = f"import sys; sys.path.insert(0, {REPO_DIR!r}); "
+    result = subprocess.run([sys.executable, "-c", prelude + code], cwd=cwd, capture_output=True, text=True, timeout=TIMEOUT)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+def test_import_main_skips_heavy_modules(tmp_path):
+    loaded = set(_python("import main; print(' '.join(sys.modules))", tmp_path).split())
+    assert [name for name in FORBIDDEN_MODULES if name in loaded] == []
+
+def test_import_main_does_not_load_settings(tmp_path):
+    assert _python("import main, utils; print(utils._settings is None)", tmp_path).strip() == "True"
+
+def test_help_creates_no_directories(tmp_path):
+    result = subprocess.run([sys.executable, os.path.join(REPO_DIR, "main.py"), "help"], cwd=tmp_path, capture_output=True, text=True, timeout=TIMEOUT)
+    assert result.returncode == 0, result.stderr
+    assert [name for name in STARTUP_DIRS if (tmp_path / name).exists()] == []
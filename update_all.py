@@ -1,12 +1,128 @@
 import logging
 import os
-from scraper import scrape_chapter_list
+import time
+import http_cache
+import metrics
+from concurrent.futures import ThreadPoolExecutor
+from budget import ChapterBudget
+from chapter_index import ChapterIndex, chapter_number
+from scraper import parse_chapter_list
+from storage import read_comic
 from update_comic import update_comic
-from utils import read_json, fetch_page, DATA_DIR
-from bs4 import BeautifulSoup
+from utils import read_json, fetch_page, DATA_DIR, DEFAULT_UPLOAD_WORKERS
 
-def update_all(start=None, end=None, overwrite=False):
-    """Update chapter berikutnya untuk semua komik berdasarkan index.json."""
+DEFAULT_CATCH_UP_BUDGET = 100
+
+@metrics.labelled(lambda comic_id, *args, **kwargs: comic_id)
+def update_one(comic_id, comic_info, start=None, overwrite=False, workers=DEFAULT_UPLOAD_WORKERS, budget=None):
+    """Update satu komik. Balikin (berhasil, keterangan).
+
+    Tanpa budget cuma chapter berikutnya yang diambil. Dengan budget (ChapterBudget)
+    jalan mode catch-up: semua chapter yang belum ada diambil sekaligus, dibatasi jatah run.
+    """
+    seen_tag = "catch-up" if budget else "next"
+    comic_url = comic_info.get("source_url", f"https://komiku.org/manga/{comic_id}")
+    comic_file = os.path.join(DATA_DIR, f"{comic_id}.json")
+    if not os.path.exists(comic_file):
+        logging.error(f"File {comic_file} ga ada. Lewati.")
+        return False, "file ga ada"
+
+    comic_title = comic_info.get("title", comic_id)
+
+    # Chapter terakhir diambil dari ringkasan di index.json; file komik cuma dibaca
+    # kalo ringkasannya belum ada atau mode catch-up butuh daftar chapter lengkap
+    if budget or "latest_chapter" not in comic_info:
+        comic_data = read_comic(comic_id, with_images=False)
+        chapters = ChapterIndex(comic_data.get("chapters", {}).keys())
+        latest_local_chapter = chapters.latest()
+    else:
+        latest_local_chapter = comic_info["latest_chapter"]
+
+    if latest_local_chapter is None:
+        logging.info(f"Komik {comic_title}: Belum ada chapter, coba add chapter pertama.")
+        try:
+            if update_comic(comic_url, start or 1, start or 1, overwrite, workers):
+                return True, f"chapter {start or 1}"
+            return False, "gagal add chapter pertama"
+        except Exception as e:
+            logging.error(f"Komik {comic_title}: Gagal add chapter pertama: {e}")
+            return False, "gagal add chapter pertama"
+
+    latest_local_chapter = chapter_number(latest_local_chapter)
+    logging.info(f"Komik {comic_title}: Chapter terakhir di JSON = {latest_local_chapter}")
+
+    # Scrape daftar chapter dari web, halamannya dipake ulang sama update_comic
+    html = fetch_page(comic_url, cache=True)
+    if not html:
+        logging.error(f"Gagal ambil halaman {comic_url}. Lewati.")
+        return False, "gagal ambil halaman"
+    if http_cache.is_unchanged(comic_url, seen_tag):
+        logging.info(f"Komik {comic_title}: Halaman ga berubah sejak dicek terakhir, skip parsing")
+        return False, "belum ada chapter baru (halaman ga berubah)"
+
+    web_chapters = ChapterIndex(parse_chapter_list(comic_url, html).keys())
+    if not web_chapters:
+        logging.warning(f"Ga ada chapter ditemukan untuk {comic_title}. Lewati.")
+        return False, "chapter ga ketemu"
+
+    if budget:
+        return _catch_up(comic_url, comic_title, chapters, web_chapters, html, overwrite, workers, budget)
+
+    # Ambil chapter berikutnya
+    next_chapter = web_chapters.next_after(latest_local_chapter)
+    if next_chapter is None:
+        logging.info(f"Komik {comic_title}: Belum ada chapter baru setelah {latest_local_chapter}")
+        http_cache.mark_seen(comic_url, seen_tag)
+        return False, "belum ada chapter baru"
+    logging.info(f"Komik {comic_title}: Coba update chapter {next_chapter}")
+
+    try:
+        if update_comic(comic_url, next_chapter, next_chapter, overwrite, workers, html=html):
+            logging.info(f"Komik {comic_title}: Berhasil update chapter {next_chapter}")
+            return True, f"chapter {next_chapter}"
+        return False, f"gagal update chapter {next_chapter}"
+    except Exception as e:
+        logging.error(f"Komik {comic_title}: Gagal update chapter {next_chapter}: {e}")
+        return False, f"gagal update chapter {next_chapter}"
+
+def _catch_up(comic_url, comic_title, chapters, web_chapters, html, overwrite, workers, budget):
+    missing = chapters.missing_from(web_chapters)
+    if not missing:
+        logging.info(f"Komik {comic_title}: Semua chapter di web udah ada")
+        http_cache.mark_seen(comic_url, "catch-up")
+        return False, "belum ada chapter baru"
+    granted = budget.take(len(missing))
+    if not granted:
+        logging.info(f"Komik {comic_title}: {len(missing)} chapter ketinggalan, jatah run udah habis")
+        return False, f"{len(missing)} chapter nunggu jatah"
+    batch = missing[:granted]
+    logging.info(f"Komik {comic_title}: {len(missing)} chapter ketinggalan, ambil {len(batch)} ({batch[0]:g} s/d {batch[-1]:g})")
+    try:
+        ok = update_comic(comic_url, batch[0], batch[-1], overwrite, workers, html=html, only=set(batch))
+    except Exception as e:
+        logging.error(f"Komik {comic_title}: Gagal catch-up: {e}")
+        ok = False
+    if not ok:
+        budget.refund(granted)
+        return False, f"gagal catch-up {len(batch)} chapter"
+    sisa = len(missing) - len(batch)
+    return True, f"{len(batch)} chapter" + (f", sisa {sisa}" if sisa else "")
+
+def _timed_update(comic_id, comic_info, start, overwrite, workers, budget):
+    started = time.monotonic()
+    try:
+        ok, note = update_one(comic_id, comic_info, start, overwrite, workers, budget)
+    except Exception as e:
+        logging.error(f"Komik {comic_id}: Error tak terduga: {e}")
+        ok, note = False, str(e)
+    return ok, note, time.monotonic() - started
+
+def update_all(start=None, end=None, overwrite=False, workers=DEFAULT_UPLOAD_WORKERS, parallel=1, catch_up=False, budget=DEFAULT_CATCH_UP_BUDGET):
+    """Update chapter berikutnya untuk semua komik berdasarkan index.json.
+
+    parallel = jumlah komik yang diproses barengan; batas per host diatur di http_client.
+    catch_up = ambil semua chapter yang ketinggalan, maksimal `budget` chapter per run.
+    """
     logging.info("Mengecek chapter berikutnya untuk semua komik...")
     index_file = os.path.join(DATA_DIR, "index.json")
     index_data = read_json(index_file) or {}
@@ -14,73 +130,29 @@ def update_all(start=None, end=None, overwrite=False):
         logging.warning("Ga ada komik di index.json, bro!")
         return
 
-    failed_comics = []
-    for comic_id, comic_info in index_data.items():
-        comic_url = comic_info.get("source_url", f"https://komiku.org/manga/{comic_id}")
-        comic_file = os.path.join(DATA_DIR, f"{comic_id}.json")
-        if not os.path.exists(comic_file):
-            logging.error(f"File {comic_file} ga ada. Lewati.")
-            failed_comics.append(comic_id)
-            continue
-
-        # Baca chapter terakhir
-        comic_data = read_json(comic_file)
-        chapters = comic_data.get("chapters", {})
-        comic_title = comic_info.get("title", comic_id)
-
-        if not chapters:
-            logging.info(f"Komik {comic_title}: Belum ada chapter, coba add chapter pertama.")
-            try:
-                update_comic(comic_url, start or 1, start or 1, overwrite)
-            except Exception as e:
-                logging.error(f"Komik {comic_title}: Gagal add chapter pertama: {e}")
-                failed_comics.append(comic_id)
-            continue
-
-        # Ambil chapter terakhir
-        latest_local_chapter = max([float(ch) for ch in chapters.keys()])
-        latest_local_chapter = int(latest_local_chapter) if latest_local_chapter.is_integer() else latest_local_chapter
-        logging.info(f"Komik {comic_title}: Chapter terakhir di JSON = {latest_local_chapter}")
-
-        # Scrape daftar chapter dari web
-        html = fetch_page(comic_url)
-        if not html:
-            logging.error(f"Gagal ambil halaman {comic_url}. Lewati.")
-            failed_comics.append(comic_id)
-            continue
-
-        soup = BeautifulSoup(html, "html.parser")
-        web_chapters = scrape_chapter_list(comic_url, soup)
-        if not web_chapters:
-            logging.warning(f"Ga ada chapter ditemukan untuk {comic_title}. Lewati.")
-            failed_comics.append(comic_id)
-            continue
-
-        # Filter chapter berikutnya
-        new_chapters = [ch for ch in web_chapters.keys() if float(ch) > latest_local_chapter]
-        if not new_chapters:
-            logging.info(f"Komik {comic_title}: Belum ada chapter baru setelah {latest_local_chapter}")
-            failed_comics.append(comic_id)
-            continue
-
-        # Ambil chapter berikutnya
-        next_chapter = min([float(ch) for ch in new_chapters])
-        next_chapter = int(next_chapter) if next_chapter.is_integer() else next_chapter
-        logging.info(f"Komik {comic_title}: Coba update chapter {next_chapter}")
-
-        try:
-            update_comic(comic_url, next_chapter, next_chapter, overwrite)
-            logging.info(f"Komik {comic_title}: Berhasil update chapter {next_chapter}")
-        except Exception as e:
-            logging.error(f"Komik {comic_title}: Gagal update chapter {next_chapter}: {e}")
-            failed_comics.append(comic_id)
+    run_started = time.monotonic()
+    chapter_budget = ChapterBudget(budget) if catch_up else None
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, parallel)) as executor:
+        futures = {
+            comic_id: executor.submit(_timed_update, comic_id, comic_info, start, overwrite, workers, chapter_budget)
+            for comic_id, comic_info in index_data.items()
+        }
+        for comic_id, future in futures.items():
+            results[comic_id] = future.result()
+    failed_comics = [comic_id for comic_id, (ok, _, _) in results.items() if not ok]
 
     # Rekap
-    logging.info("Selesai update-all!")
+    logging.info(f"Selesai update-all dalam {time.monotonic() - run_started:.1f}s!")
+    logging.info("\n=== Waktu per komik ===")
+    for comic_id, (ok, note, elapsed) in sorted(results.items(), key=lambda item: -item[1][2]):
+        logging.info(f"- {comic_id}: {elapsed:.1f}s ({'OK' if ok else 'lewat'}: {note})")
     if failed_comics:
         logging.info("\n=== Komik yang tidak di-update ===")
-        for comic_id in set(failed_comics):
+        for comic_id in failed_comics:
             comic_url = index_data.get(comic_id, {}).get("source_url", f"https://komiku.org/manga/{comic_id}")
             logging.info(f"- {comic_id}: {comic_url}")
     else:
-        logging.info("Semua komik berhasil diupdate, bro!")
\ No newline at end of file
+        logging.info("Semua komik berhasil diupdate, bro!")
+    http_cache.evict()
+    logging.info(f"Cache HTTP: {http_cache.stats()}")
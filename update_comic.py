@@ -1,29 +1,53 @@
 import os
 import logging
-from bs4 import BeautifulSoup
+import metrics
 from urllib.parse import urljoin
-from utils import fetch_page, read_json, write_json, DATA_DIR, get_comic_id_from_url, upload_to_cloudinary
+from chapter_index import ChapterIndex, chapter_number
+from scraper import make_soup, CHAPTER_LIST_STRAINER, CHAPTER_IMAGES_STRAINER
+from storage import read_comic, read_chapter, write_comic, update_summary
+from utils import page_logger, fetch_page, DATA_DIR, get_comic_id_from_url, upload_chapter_images, chapter_image_meta, DEFAULT_UPLOAD_WORKERS
 
-def update_comic(url, start, end, overwrite=False):
+def _save_chapter(comic_id, comic_data, key, chapter, existing_key=None):
+    """Simpan satu chapter begitu selesai, biar run yang mati di tengah range ga ngulang
+    chapter yang udah beres. Key lama yang belum normal ("69.0") diganti key kanonik."""
+    chapters = comic_data.setdefault("chapters", {})
+    removed = [existing_key] if existing_key and existing_key != key else []
+    for old_key in removed:
+        chapters.pop(old_key, None)
+    chapters[key] = chapter
+    comic_data["total_chapters"] = len(chapters)
+    write_comic(comic_id, comic_data, changed=[key], removed=removed)
+
+@metrics.labelled(lambda url, *args, **kwargs: get_comic_id_from_url(url))
+def update_comic(url, start, end, overwrite=False, workers=DEFAULT_UPLOAD_WORKERS, html=None, only=None):
+    """Update chapter start..end.
+
+    html = halaman komik yang udah di-fetch (opsional), only = kumpulan nomor chapter
+    (float) kalo cuma chapter tertentu di dalam range yang mau diambil.
+    Chapter yang ada halamannya gagal upload ga disimpen (dicoba lagi run berikutnya,
+    halaman yang udah keupload diambil dari image_cache) dan hasilnya False.
+    """
     logging.info(f"Mulai update: {url}")
     comic_id = get_comic_id_from_url(url)
     comic_file = os.path.join(DATA_DIR, f"{comic_id}.json")
-    comic_data = read_json(comic_file)
+    comic_data = read_comic(comic_id, with_images=False)
     if not comic_data:
         logging.error(f"File {comic_file} ga ada, bro!")
-        return
+        return False
 
-    html = fetch_page(url)
+    html = html or fetch_page(url, cache=True)
     if not html:
         logging.error(f"Gagal ambil halaman {url}")
-        return
+        return False
 
     try:
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = make_soup(html, parse_only=CHAPTER_LIST_STRAINER)
         chapter_list = soup.select('td.judulseries a, table tr a:has(span)')
         logging.info(f"Found {len(chapter_list)} chapter links")
 
+        local_chapters = ChapterIndex(comic_data.get("chapters", {}).keys())
         chapters = {}
+        failed_pages = {}
         for chapter in chapter_list:
             chapter_url = chapter.get('href', '').strip()
             if not chapter_url:
@@ -33,40 +57,47 @@ def update_comic(url, start, end, overwrite=False):
             chapter_text = chapter.find('span').text.strip() if chapter.find('span') else chapter.text.strip()
 
             try:
-                chapter_num = chapter_text.lower().replace('chapter ', '').replace('bab ', '').strip()
-                chapter_num = float(chapter_num)
-                chapter_num = int(chapter_num) if chapter_num.is_integer() else chapter_num
-                if start <= chapter_num <= end:
-                    # Cek key "1", "1.0", "1.00", dll
-                    chapter_keys = [str(chapter_num), str(float(chapter_num)), f"{float(chapter_num):.1f}", f"{float(chapter_num):.2f}"]
+                chapter_num = chapter_number(chapter_text)
+                if start <= chapter_num <= end and (only is None or chapter_num in only):
                     existing_chapter = {}
-                    for key in chapter_keys:
-                        if key in comic_data.get('chapters', {}):
-                            existing_chapter = comic_data.get('chapters', {}).get(key, {})
-                            logging.info(f"Found existing chapter {chapter_num} with key {key}")
-                            break
+                    existing_key = local_chapters.get_key(chapter_num)
+                    if existing_key:
+                        existing_chapter = read_chapter(comic_id, comic_data, existing_key)
+                        logging.info(f"Found existing chapter {chapter_num} with key {existing_key}")
 
                     if existing_chapter.get('images') and all(img and 'cloudinary.com' in img for img in existing_chapter.get('images', [])) and not overwrite:
                         logging.info(f"Chapter {chapter_num} sudah ada gambar, skip upload")
                         chapters[str(chapter_num)] = existing_chapter
+                        if existing_key != str(chapter_num):
+                            _save_chapter(comic_id, comic_data, str(chapter_num), existing_chapter, existing_key)
                         continue
 
                     # Scrape gambar
                     chapter_html = fetch_page(chapter_url)
                     images = []
                     if chapter_html:
-                        chapter_soup = BeautifulSoup(chapter_html, 'html.parser')
+                        chapter_soup = make_soup(chapter_html, parse_only=CHAPTER_IMAGES_STRAINER)
                         image_elements = chapter_soup.select('div#Baca_Komik img[itemprop="image"]')
+                        pending = []
                         for img in image_elements:
                             img_url = img.get('src', '').strip()
                             if img_url and img_url.startswith('http'):
-                                if 'cloudinary.com' in img_url or any(img_url == existing_img for existing_img in existing_chapter.get('images', [])) and not overwrite:
-                                    logging.info(f"Gambar sudah ada untuk Chapter {chapter_num}: {img_url}")
-                                    images.append(img_url)
+                                # Cuma URL Cloudinary yang dianggap udah keupload; URL sumber yang
+                                # kesimpen dari upload gagal harus dicoba lagi
+                                if 'cloudinary.com' in img_url:
+                                    page_logger.info(f"Gambar sudah ada untuk Chapter {chapter_num}: {img_url}", extra={"sample_key": f"{comic_id}/{chapter_num}/existing"})
                                 else:
-                                    cloudinary_url = upload_to_cloudinary(img_url, comic_id, str(chapter_num))
-                                    images.append(cloudinary_url)
+                                    pending.append(len(images))
+                                images.append(img_url)
+                        if pending:
+                            uploaded, failures = upload_chapter_images([images[i] for i in pending], comic_id, str(chapter_num), workers)
+                            for i, cloudinary_url in zip(pending, uploaded):
+                                images[i] = cloudinary_url
+                            if failures:
+                                failed_pages[str(chapter_num)] = [pending[page - 1] + 1 for page, _, _ in failures]
                         logging.info(f"Scraped {len(images)} images for Chapter {chapter_num}")
+                        if str(chapter_num) in failed_pages:
+                            continue
                     else:
                         logging.warning(f"Gagal ambil halaman chapter {chapter_url}")
 
@@ -75,28 +106,23 @@ def update_comic(url, start, end, overwrite=False):
                         "url": chapter_url,
                         "images": images
                     }
+                    image_meta = chapter_image_meta(images)
+                    if image_meta:
+                        chapters[str(chapter_num)]["image_meta"] = image_meta
+                    _save_chapter(comic_id, comic_data, str(chapter_num), chapters[str(chapter_num)], existing_key)
             except (ValueError, IndexError):
                 logging.warning(f"Ga bisa parse chapter number dari: {chapter_text}")
                 continue
 
         logging.info(f"Filtered {len(chapters)} chapters in range {start} to {end}")
+        for num, pages in failed_pages.items():
+            logging.warning(f"Chapter {num}: {len(pages)} halaman gagal upload (halaman {', '.join(map(str, pages))}), chapter ga disimpen, dicoba lagi run berikutnya")
 
-        comic_data["chapters"] = comic_data.get("chapters", {})
-        if overwrite:
-            comic_data["chapters"].update(chapters)
-        else:
-            for num, chapter in chapters.items():
-                comic_data["chapters"][num] = chapter
-        comic_data["total_chapters"] = len(comic_data["chapters"])
-
-        write_json(comic_file, comic_data)
         logging.info(f"Berhasil disimpan ke {comic_file}")
 
-        index_file = os.path.join(DATA_DIR, "index.json")
-        index_data = read_json(index_file) or {}
-        if comic_id in index_data:
-            index_data[comic_id]["total_chapters"] = comic_data["total_chapters"]
-            write_json(index_file, index_data)
-            logging.info(f"Updated {comic_id} in {index_file}")
+        if update_summary(comic_id, comic_data):
+            logging.info(f"Updated {comic_id} in index.json")
+        return not failed_pages
     except Exception as e:
-        logging.error(f"Error scraping {url}: {e}")
\ No newline at end of file
+        logging.error(f"Error scraping {url}: {e}")
+        return False
\ No newline at end of file
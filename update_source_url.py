@@ -1,22 +1,7 @@
 import logging
-import os
-from utils import read_json, write_json, DATA_DIR
+from url_rewrite import rewrite_urls, url_mapping, IMAGE_FIELDS
 
-def update_source_url(old_url, new_url):
+def update_source_url(old_url, new_url, dry_run=False):
+    """Ganti URL gambar/cover old_url ke new_url di semua file data."""
     logging.info(f"Mengganti URL dari {old_url} ke {new_url}...")
-    for filename in os.listdir(DATA_DIR):
-        if filename.endswith(".json") and filename != "index.json":
-            file_path = os.path.join(DATA_DIR, filename)
-            data = read_json(file_path)
-            updated = False
-            if data.get("cover") == old_url:
-                data["cover"] = new_url
-                updated = True
-            for chapter in data.get("chapters", {}).values():
-                for i, page in enumerate(chapter.get("pages", [])):
-                    if page == old_url:
-                        chapter["pages"][i] = new_url
-                        updated = True
-            if updated:
-                write_json(file_path, data)
-                logging.info(f"URL diperbarui di {file_path}")
\ No newline at end of file
+    return rewrite_urls([url_mapping(old_url, new_url)], fields=IMAGE_FIELDS, dry_run=dry_run)
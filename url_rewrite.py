@@ -0,0 +1,131 @@
+import glob
+import json
+import logging
+import os
+import image_index
+from concurrent.futures import ProcessPoolExecutor
+from utils import read_json, modify_json, DATA_DIR, JOURNAL_SUFFIX
+
+# Mesin ganti URL massal buat semua file di data/: exact URL, domain, atau substring, banyak
+# mapping sekaligus dalam satu jalan. Tiap file di-scan per byte dulu; cuma file yang
+# beneran ngandung string lama yang di-parse dan ditulis ulang (atomic, paralel).
+# MATCH_DOMAIN cuma ganti host yang persis sama (http://, https:// atau //host), subdomain
+# kayak www./img. ga ikut. MATCH_SUBSTRING = str.replace biasa, dipake update-domain
+# biar perilakunya sama kayak dulu.
+MATCH_URL = "url"
+MATCH_DOMAIN = "domain"
+MATCH_SUBSTRING = "substring"
+IMAGE_FIELDS = ("cover", "images", "pages")
+SOURCE_FIELDS = ("source_url",)
+SKIP_FILES = ("queue.json",)
+DEFAULT_WORKERS = 4
+
+def url_mapping(old_url, new_url):
+    return (MATCH_URL, old_url, new_url)
+
+def domain_mapping(old_domain, new_domain):
+    return (MATCH_DOMAIN, old_domain, new_domain)
+
+def substring_mapping(old, new):
+    return (MATCH_SUBSTRING, old, new)
+
+def _needles(mapping):
+    """Bentuk byte string lama yang mungkin ada di file: mentah, escape \\uXXXX, dan "\\/"."""
+    old = mapping[1]
+    forms = {old, json.dumps(old)[1:-1], json.dumps(old, ensure_ascii=False)[1:-1]}
+    forms |= {form.replace("/", "\\/") for form in forms}
+    return [form.encode("utf-8") for form in forms]
+
+def rewrite_value(value, mappings):
+    """Versi baru dari satu string URL, atau None kalo ga ada mapping yang cocok.
+    Mapping pertama yang cocok yang dipake."""
+    for kind, old, new in mappings:
+        if kind == MATCH_URL:
+            if value == old:
+                return new
+            continue
+        if kind == MATCH_SUBSTRING:
+            if old in value:
+                return value.replace(old, new)
+            continue
+        for scheme in ("https://", "http://", "//"):
+            prefix = scheme + old
+            if value.startswith(prefix) and value[len(prefix):len(prefix) + 1] in ("", "/", ":", "?", "#"):
+                return scheme + new + value[len(prefix):]
+    return None
+
+def _rewrite(node, mappings, fields, key=None):
+    """Ganti URL di node (dict/list) di tempat. fields=None berarti semua string.
+    Balikin jumlah yang diganti."""
+    count = 0
+    items = node.items() if isinstance(node, dict) else enumerate(node)
+    for child_key, value in items:
+        field = child_key if isinstance(node, dict) else key
+        if isinstance(value, (dict, list)):
+            count += _rewrite(value, mappings, fields, field)
+        elif isinstance(value, str) and (fields is None or field in fields):
+            new_value = rewrite_value(value, mappings)
+            if new_value is not None and new_value != value:
+                node[child_key] = new_value
+                count += 1
+    return count
+
+def scan_file(file_path, needles):
+    """Pre-scan byte: True kalo file (atau journal-nya) ngandung salah satu string lama."""
+    for path in (file_path, file_path + JOURNAL_SUFFIX):
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            content = f.read()
+        if any(needle in content for needle in needles):
+            return True
+    return False
+
+def rewrite_file(file_path, mappings, fields=None, dry_run=False):
+    """Ganti URL di satu file JSON. Balikin (file_path, jumlah yang diganti, error)."""
+    try:
+        if dry_run:
+            return file_path, _rewrite(read_json(file_path), mappings, fields), None
+        return file_path, modify_json(file_path, lambda data: _rewrite(data, mappings, fields)), None
+    except (OSError, ValueError) as e:
+        return file_path, 0, str(e)
+
+def data_files(data_dir=DATA_DIR):
+    """File komik, index, manifest, dan file chapter layout sharded."""
+    files = glob.glob(os.path.join(data_dir, "*.json")) + glob.glob(os.path.join(data_dir, "*", "*.json"))
+    return sorted(path for path in files if os.path.basename(path) not in SKIP_FILES)
+
+def rewrite_urls(mappings, fields=None, dry_run=False, workers=DEFAULT_WORKERS, data_dir=DATA_DIR):
+    """Jalanin semua mapping ke semua file di data_dir dalam satu jalan.
+
+    Balikin {file: jumlah yang diganti} buat file yang berubah (atau bakal berubah kalo dry_run).
+    """
+    mappings = [tuple(mapping) for mapping in mappings]
+    needles = [needle for mapping in mappings for needle in _needles(mapping)]
+    files = data_files(data_dir)
+    candidates = [path for path in files if scan_file(path, needles)]
+    logging.info(f"Ganti URL: {len(candidates)} dari {len(files)} file ngandung string lama")
+    results = {}
+    if workers > 1 and len(candidates) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(candidates))) as executor:
+            outcomes = list(executor.map(rewrite_file, candidates, [mappings] * len(candidates),
+                                         [fields] * len(candidates), [dry_run] * len(candidates)))
+    else:
+        outcomes = [rewrite_file(path, mappings, fields, dry_run) for path in candidates]
+    for file_path, count, error in outcomes:
+        if error:
+            logging.error(f"Gagal proses {file_path}: {error}")
+        elif count:
+            results[file_path] = count
+            logging.info(f"{'[dry-run] ' if dry_run else ''}{file_path}: {count} URL {'bakal ' if dry_run else ''}diganti")
+    logging.info(f"Ganti URL selesai: {sum(results.values())} URL di {len(results)} file{' (dry-run, ga ada yang ditulis)' if dry_run else ''}")
+    if results and not dry_run:
+        image_index.rebuild(sorted({_comic_id(path, data_dir) for path in results} - {None}))
+    return results
+
+def _comic_id(file_path, data_dir):
+    """ID komik dari data/<komik>.json atau data/<komik>/<chapter>.json, None buat index.json."""
+    relative = os.path.relpath(file_path, data_dir).split(os.sep)
+    if len(relative) > 1:
+        return relative[0]
+    return None if relative[0] == "index.json" else relative[0][:-len(".json")]
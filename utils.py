@@ -1,13 +1,18 @@
+import glob
+import io
 import json
 import logging
 import os
-import subprocess
+import tempfile
+import threading
 import time
-import requests
+import image_cache
+import image_optimize
+import log_config
+import metrics
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser
-import cloudinary
-import cloudinary.uploader
-from filelock import FileLock
+from types import SimpleNamespace
 from urllib.parse import urlparse, parse_qs, urlencode
 
 # Direktori
@@ -15,58 +20,136 @@ DATA_DIR = "data"
 TEMP_IMAGES_DIR = "temp_images"
 LOG_DIR = "logs"
 QUEUE_FILE = "queue.json"
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_COMPACT_ENTRIES = 50
+DEFAULT_UPLOAD_WORKERS = 4
+# Batas memori per gambar yang lagi diproses
+SPOOL_MAX_BYTES = 4 * 1024 * 1024
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+CONFIG_FILE = "config.ini"
 
-# Setup direktori
-for directory in [DATA_DIR, TEMP_IMAGES_DIR, LOG_DIR]:
-    if not os.path.exists(directory):
-        os.makedirs(directory)
-
-# Load konfigurasi
-config = ConfigParser()
-config.read("config.ini")
-CLOUDINARY_CLOUD_NAME = config.get("Cloudinary", "CloudName")
-CLOUDINARY_API_KEY = config.get("Cloudinary", "ApiKey")
-CLOUDINARY_API_SECRET = config.get("Cloudinary", "ApiSecret")
-GITHUB_TOKEN = config.get("GitHub", "GitHubToken")
-GITHUB_REPO = config.get("GitHub", "GitHubRepo")
-
-cloudinary.config(
-    cloud_name=CLOUDINARY_CLOUD_NAME,
-    api_key=CLOUDINARY_API_KEY,
-    api_secret=CLOUDINARY_API_SECRET
-)
+# Konfigurasi dibaca pas pertama kali dipake, bukan pas import: lewat settings().
+# Modul lain manggil settings() di dalam fungsi; `from utils import DATA_LAYOUT` di level
+# modul bakal baca config.ini pas import (dicek sama benchmark.py --startup).
+# Credential Cloudinary cuma wajib buat upload, GitHub cuma buat push.
+_settings = None
+_settings_lock = threading.Lock()
+_cloudinary_ready = False
+
+def _load_settings():
+    config = ConfigParser()
+    config.read(CONFIG_FILE)
+    # [Metrics] Enabled = true: metrik per tahap ke metrics/ tiap command selesai (bisa juga main.py --metrics)
+    if config.getboolean("Metrics", "Enabled", fallback=False):
+        metrics.enable(config.get("Metrics", "Dir", fallback=None))
+    widths = config.get("Images", "Widths", fallback=",".join(map(str, image_optimize.DEFAULT_WIDTHS)))
+    return SimpleNamespace(
+        config=config,
+        CLOUDINARY_CLOUD_NAME=config.get("Cloudinary", "CloudName", fallback=""),
+        CLOUDINARY_API_KEY=config.get("Cloudinary", "ApiKey", fallback=""),
+        CLOUDINARY_API_SECRET=config.get("Cloudinary", "ApiSecret", fallback=""),
+        GITHUB_TOKEN=config.get("GitHub", "GitHubToken", fallback=""),
+        GITHUB_REPO=config.get("GitHub", "GitHubRepo", fallback=""),
+        # Remote = URL/path lain (misal bare repo lokal buat ngetes), default repo GitHub di atas
+        GITHUB_REMOTE=config.get("GitHub", "Remote", fallback=""),
+        GITHUB_BRANCH=config.get("GitHub", "Branch", fallback="main"),
+        # Update yang datang dalam jendela ini digabung jadi satu commit
+        PUSH_WINDOW=config.getint("GitHub", "PushWindow", fallback=15 * 60),
+        # "single" (satu file per komik) atau "sharded" (manifest + satu file per chapter) buat komik baru
+        DATA_LAYOUT=config.get("Storage", "Layout", fallback="single"),
+        HTTP_CACHE_ENABLED=config.getboolean("Cache", "HttpCache", fallback=True),
+        HTML_PARSER=config.get("Scraper", "Parser", fallback=""),
+        # [Images] Optimize = true: transcode ke WebP/AVIF + varian lebar sebelum upload (butuh Pillow)
+        IMAGE_OPTIMIZE=config.getboolean("Images", "Optimize", fallback=False),
+        IMAGE_FORMAT=config.get("Images", "Format", fallback=image_optimize.DEFAULT_FORMAT),
+        IMAGE_QUALITY=config.getint("Images", "Quality", fallback=image_optimize.DEFAULT_QUALITY),
+        IMAGE_WIDTHS=[int(width) for width in widths.split(",") if width.strip()],
+        IMAGE_OPTIMIZE_WORKERS=config.getint("Images", "Workers", fallback=image_optimize.DEFAULT_WORKERS),
+    )
+
+def settings():
+    """Setting dari config.ini (dibaca sekali)."""
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = _load_settings()
+    return _settings
+
+def __getattr__(name):
+    # utils.config, utils.DATA_LAYOUT, dst. diambil dari settings() pas pertama diakses.
+    # Nama dunder (misal __path__ yang dicek tiap `from utils import ...`) ga boleh baca config.
+    if name.startswith("__"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    try:
+        return getattr(settings(), name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+def _uploader():
+    """cloudinary.uploader, di-import dan dikonfigurasi pas upload pertama."""
+    global _cloudinary_ready
+    import cloudinary
+    import cloudinary.uploader
+    if not _cloudinary_ready:
+        current = settings()
+        if not current.CLOUDINARY_CLOUD_NAME:
+            raise ValueError(f"[Cloudinary] CloudName belum diisi di {CONFIG_FILE}, bro!")
+        cloudinary.config(
+            cloud_name=current.CLOUDINARY_CLOUD_NAME,
+            api_key=current.CLOUDINARY_API_KEY,
+            api_secret=current.CLOUDINARY_API_SECRET
+        )
+        _cloudinary_ready = True
+    return cloudinary.uploader
+
+def _file_lock(file_path):
+    from filelock import FileLock
+    return FileLock(file_path + ".lock")
+
+# Log per halaman cuma sebagian yang ditulis (lihat log_config.PageSampler), ringkasannya per chapter
+page_logger = logging.getLogger(log_config.PAGE_LOGGER)
 
 def setup_logging():
-    LOG_FILE = os.path.join(LOG_DIR, "update.log")
-    if os.path.exists(LOG_FILE):
-        backup_file = os.path.join(LOG_DIR, "update.log.1")
-        if os.path.exists(backup_file):
-            os.remove(backup_file)
-        os.rename(LOG_FILE, backup_file)
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-    file_handler = logging.FileHandler(LOG_FILE)
-    file_handler.setFormatter(formatter)
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-
-def fetch_page(url, retries=3, delay=2):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8"
-    }
-    for attempt in range(retries):
+    """Logging lewat queue + thread listener. Setting di [Logging] config.ini:
+    Rotate = size / midnight / H, MaxBytes, Backups, Json = true buat JSON lines,
+    ConsoleLevel, PageLogFirst / PageLogEvery buat sampling log per halaman."""
+    config = settings().config
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_config.setup_logging(
+        LOG_DIR,
+        rotate=config.get("Logging", "Rotate", fallback="size"),
+        max_bytes=config.getint("Logging", "MaxBytes", fallback=log_config.DEFAULT_MAX_BYTES),
+        backups=config.getint("Logging", "Backups", fallback=log_config.DEFAULT_BACKUPS),
+        json_lines=config.getboolean("Logging", "Json", fallback=False),
+        console_level=config.get("Logging", "ConsoleLevel", fallback="INFO").upper(),
+        page_log_first=config.getint("Logging", "PageLogFirst", fallback=log_config.DEFAULT_PAGE_LOG_FIRST),
+        page_log_every=config.getint("Logging", "PageLogEvery", fallback=log_config.DEFAULT_PAGE_LOG_EVERY),
+    )
+
+def fetch_page(url, retries=3, delay=2, cache=False):
+    """Ambil HTML satu halaman, None kalo gagal.
+
+    cache=True buat halaman komik (daftar chapter) yang dicek berulang: disimpen di
+    http_cache dan divalidasi ulang pake conditional GET. Halaman chapter dibaca
+    sekali, jadi defaultnya ga disimpen biar ga ngabisin budget cache.
+    """
+    import requests
+    import http_cache
+    import http_client
+    with metrics.timer("fetch") as timer:
         try:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            return response.text
+            if cache and settings().HTTP_CACHE_ENABLED:
+                html = http_cache.fetch(url, retries=retries, backoff=delay)
+            else:
+                html = http_client.get(url, retries=retries, backoff=delay).text
+            if html:
+                timer.add_bytes(len(html))
+            return html
         except requests.RequestException as e:
-            logging.warning(f"Gagal mengambil {url} (percobaan {attempt + 1}/{retries}): {e}")
-            if attempt < retries - 1:
-                time.sleep(delay)
+            logging.warning(f"Gagal mengambil {url}: {e}")
+            metrics.inc_error("fetch")
     return None
 
 def paraphrase_synopsis(original_synopsis):
@@ -100,62 +183,318 @@ def paraphrase_synopsis(original_synopsis):
     logging.info(f"Sinopsis gaul: {synopsis}")
     return synopsis
 
+def _load_json(file_path):
+    """Baca file + replay journal-nya (kalo ada). Panggil sambil pegang lock."""
+    data = {}
+    if os.path.exists(file_path):
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    journal_path = file_path + JOURNAL_SUFFIX
+    if os.path.exists(journal_path):
+        _replay_journal(data, journal_path)
+    return data
+
+def _replay_journal(data, journal_path):
+    entries = 0
+    with open(journal_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Baris terakhir kepotong gara-gara crash waktu append, sisanya diabaikan
+                logging.warning(f"Journal {journal_path} kepotong di entry {entries + 1}, sisanya diabaikan")
+                break
+            if "chapter" in entry:
+                data.setdefault("chapters", {})[entry["chapter"]] = entry["value"]
+            else:
+                data.update(entry.get("fields", {}))
+            entries += 1
+    return entries
+
+def _drop_partial_line(journal_path):
+    """Buang baris terakhir yang kepotong biar append berikutnya ga ikut rusak."""
+    if not os.path.exists(journal_path):
+        return
+    with open(journal_path, "rb+") as f:
+        content = f.read()
+        if content and not content.endswith(b"\n"):
+            f.truncate(content.rfind(b"\n") + 1)
+
+def _atomic_dump(file_path, data):
+    temp_path = f"{file_path}.{os.getpid()}.tmp"
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, file_path)
+
 def read_json(file_path):
-    lock = FileLock(file_path + ".lock")
-    with lock:
-        if os.path.exists(file_path):
-            with open(file_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        return {}
+    lock = _file_lock(file_path)
+    with metrics.timer("read_json") as timer, lock:
+        data = _load_json(file_path)
+        if metrics.ENABLED and os.path.exists(file_path):
+            timer.add_bytes(os.path.getsize(file_path))
+        return data
 
 def write_json(file_path, data):
-    lock = FileLock(file_path + ".lock")
+    """Tulis full (temp file + rename), journal lama jadi basi dan dihapus."""
+    lock = _file_lock(file_path)
+    with metrics.timer("write_json") as timer, lock:
+        _atomic_dump(file_path, data)
+        if metrics.ENABLED:
+            timer.add_bytes(os.path.getsize(file_path))
+        journal_path = file_path + JOURNAL_SUFFIX
+        if os.path.exists(journal_path):
+            os.remove(journal_path)
+
+def modify_json(file_path, transform):
+    """Read-modify-write satu file di bawah satu lock. transform(data) ngubah data di tempat
+    dan balikin nilai truthy kalo ada yang berubah; cuma kalo berubah file-nya ditulis ulang."""
+    lock = _file_lock(file_path)
     with lock:
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
+        data = _load_json(file_path)
+        result = transform(data)
+        if result:
+            _atomic_dump(file_path, data)
+            journal_path = file_path + JOURNAL_SUFFIX
+            if os.path.exists(journal_path):
+                os.remove(journal_path)
+        return result
 
-def upload_to_cloudinary(image_url, comic_id, chapter_num):
+def append_json(file_path, fields=None, chapters=None):
+    """Catat perubahan kecil ke <file>.journal tanpa nulis ulang file utamanya.
+
+    fields: field top-level yang di-set, chapters: {key: record chapter lengkap}.
+    Kalo journal udah JOURNAL_COMPACT_ENTRIES entry, langsung di-compact.
+    """
+    journal_path = file_path + JOURNAL_SUFFIX
+    lines = [json.dumps({"chapter": key, "value": value}) for key, value in (chapters or {}).items()]
+    if fields:
+        lines.append(json.dumps({"fields": fields}))
+    lock = _file_lock(file_path)
+    with lock:
+        _drop_partial_line(journal_path)
+        with open(journal_path, "a", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in lines))
+            f.flush()
+            os.fsync(f.fileno())
+        with open(journal_path, "r", encoding="utf-8") as f:
+            entries = sum(1 for _ in f)
+        if entries >= JOURNAL_COMPACT_ENTRIES:
+            _compact(file_path)
+
+def update_index(comic_id, fields, create=False):
+    """Update entry komik di index.json dalam satu lock (aman buat update paralel).
+
+    Balikin False kalo komiknya ga ada di index dan create=False.
+    """
+    index_file = os.path.join(DATA_DIR, "index.json")
+    lock = _file_lock(index_file)
+    with lock:
+        index_data = _load_json(index_file)
+        if comic_id not in index_data and not create:
+            return False
+        index_data.setdefault(comic_id, {}).update(fields)
+        _atomic_dump(index_file, index_data)
+    return True
+
+def _compact(file_path):
+    data = _load_json(file_path)
+    _atomic_dump(file_path, data)
+    os.remove(file_path + JOURNAL_SUFFIX)
+    logging.info(f"Journal {file_path} di-compact")
+
+def compact_json(file_path):
+    """Gabungin journal ke file utamanya (atomic)."""
+    lock = _file_lock(file_path)
+    with lock:
+        if os.path.exists(file_path + JOURNAL_SUFFIX):
+            _compact(file_path)
+
+def compact_all(data_dir=DATA_DIR):
+    """Compact semua journal di data_dir, dipanggil sebelum publish."""
+    journals = glob.glob(os.path.join(data_dir, "*" + JOURNAL_SUFFIX))
+    for journal_path in journals:
+        compact_json(journal_path[:-len(JOURNAL_SUFFIX)])
+    return len(journals)
+
+def download_image(image_url):
+    """Download gambar ke SpooledTemporaryFile, tanpa file temp bernama.
+
+    Sampai SPOOL_MAX_BYTES gambar ditahan di memori, lebih dari itu tumpah ke file
+    anonim di TEMP_IMAGES_DIR. Gambar lebih gede dari MAX_IMAGE_BYTES ditolak.
+    """
+    import http_client
+    response = http_client.get(image_url, headers=http_client.IMAGE_HEADERS, stream=True)
+    os.makedirs(TEMP_IMAGES_DIR, exist_ok=True)
+    buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, dir=TEMP_IMAGES_DIR)
+    try:
+        size = 0
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > MAX_IMAGE_BYTES:
+                raise ValueError(f"Gambar lebih dari {MAX_IMAGE_BYTES} bytes")
+            buffer.write(chunk)
+        buffer.seek(0)
+        return buffer
+    except Exception:
+        buffer.close()
+        raise
+    finally:
+        response.close()
+
+def _upload_image(image_url, comic_id, chapter_num):
+    """Download satu gambar lalu upload ke Cloudinary. Raise kalo gagal.
+
+    Balikin (secure_url, asal): asal "cache" (URL sumber udah pernah diupload),
+    "dedupe" (isinya sama dengan gambar lain), atau "upload".
+    """
+    image_name = os.path.basename(urlparse(image_url).path)
+    folder = f"greedycomichub/{comic_id}/chapter_{chapter_num}" if chapter_num != "cover" else f"greedycomichub/{comic_id}/cover"
+    sample = {"sample_key": f"{comic_id}/{chapter_num}", "comic": comic_id}
+    cached_url = image_cache.lookup_url(image_url)
+    if cached_url:
+        page_logger.info(f"Gambar {image_name} udah pernah diupload: {cached_url}", extra=sample)
+        return cached_url, "cache"
+    with metrics.timer("download", comic_id) as timer:
+        buffer = download_image(image_url)
+        if metrics.ENABLED:
+            timer.add_bytes(buffer.seek(0, os.SEEK_END))
+            buffer.seek(0)
+    with buffer:
+        digest = image_cache.content_hash(buffer)
+        cached_url = image_cache.lookup_hash(digest)
+        if cached_url:
+            image_cache.record(cached_url, source_url=image_url)
+            page_logger.info(f"Gambar {image_name} isinya sama dengan yang udah ada: {cached_url}", extra=sample)
+            return cached_url, "dedupe"
+        with metrics.timer("optimize", comic_id):
+            optimized = _optimize_image(buffer, image_name)
+        if optimized:
+            with metrics.timer("upload", comic_id) as timer:
+                secure_url, meta = _upload_optimized(optimized, image_name, folder)
+                timer.add_bytes(len(optimized["data"]) + sum(len(data) for _, data in optimized["variants"]))
+            image_cache.record(secure_url, source_url=image_url, digest=digest, meta=meta)
+            page_logger.info(f"Gambar {image_name} dioptimasi ({settings().IMAGE_FORMAT}, {len(meta['variants'])} varian) dan diupload: {secure_url}", extra=sample)
+            return secure_url, "upload"
+        with metrics.timer("upload", comic_id) as timer:
+            upload_result = _uploader().upload(
+                buffer,
+                filename=image_name,
+                folder=folder,
+                overwrite=True,
+                resource_type="image"
+            )
+            if metrics.ENABLED:
+                timer.add_bytes(buffer.seek(0, os.SEEK_END))
+    image_cache.record(upload_result["secure_url"], source_url=image_url, digest=digest)
+    page_logger.info(f"Gambar {image_name} diupload ke Cloudinary: {upload_result['secure_url']}", extra=sample)
+    return upload_result["secure_url"], "upload"
+
+def _optimize_image(buffer, image_name):
+    """Hasil image_optimize.transcode, atau None kalo optimasi mati/gagal (gambar asli yang diupload).
+
+    Transcode butuh seluruh isi gambar di memori (plus salinan yang dikirim ke process pool),
+    jadi gambar yang udah tumpah ke disk (> SPOOL_MAX_BYTES) ga dioptimasi.
+    """
+    current = settings()
+    if not current.IMAGE_OPTIMIZE:
+        return None
+    if not image_optimize.available(current.IMAGE_FORMAT):
+        image_optimize.warn_unavailable(current.IMAGE_FORMAT)
+        return None
+    size = buffer.seek(0, os.SEEK_END)
+    buffer.seek(0)
+    if size > SPOOL_MAX_BYTES:
+        logging.info(f"Gambar {image_name} {size} bytes, lebih dari {SPOOL_MAX_BYTES}: upload gambar asli tanpa optimasi")
+        return None
     try:
-        response = requests.get(image_url, timeout=10)
-        response.raise_for_status()
-        parsed_url = urlparse(image_url)
-        image_name = os.path.basename(parsed_url.path)
-        temp_path = os.path.join(TEMP_IMAGES_DIR, image_name)
-        with open(temp_path, "wb") as f:
-            f.write(response.content)
-        folder = f"greedycomichub/{comic_id}/chapter_{chapter_num}" if chapter_num != "cover" else f"greedycomichub/{comic_id}/cover"
-        upload_result = cloudinary.uploader.upload(
-            temp_path,
+        return image_optimize.optimize(buffer.read(), current.IMAGE_FORMAT, current.IMAGE_WIDTHS, current.IMAGE_QUALITY, current.IMAGE_OPTIMIZE_WORKERS)
+    except Exception as e:
+        logging.warning(f"Gagal optimasi {image_name}, upload gambar asli: {e}")
+        return None
+    finally:
+        buffer.seek(0)
+
+def _upload_optimized(optimized, image_name, folder):
+    """Upload gambar hasil optimasi + varian lebarnya. Balikin (secure_url, meta)."""
+    stem = os.path.splitext(image_name)[0]
+    extension = image_optimize.FORMATS[settings().IMAGE_FORMAT][1]
+    def upload(data, name):
+        return _uploader().upload(
+            io.BytesIO(data),
+            filename=name,
             folder=folder,
             overwrite=True,
             resource_type="image"
-        )
-        os.remove(temp_path)
-        logging.info(f"Gambar {image_name} diupload ke Cloudinary: {upload_result['secure_url']}")
-        return upload_result["secure_url"]
+        )["secure_url"]
+    secure_url = upload(optimized["data"], f"{stem}.{extension}")
+    variants = {str(width): upload(data, f"{stem}_w{width}.{extension}") for width, data in optimized["variants"]}
+    return secure_url, {"width": optimized["width"], "height": optimized["height"], "variants": variants}
+
+def chapter_image_meta(images):
+    """Meta (ukuran + varian) per halaman sesuai urutan images, None kalo ga ada halaman yang dioptimasi."""
+    meta = [image_cache.lookup_meta(url) for url in images]
+    return meta if any(meta) else None
+
+def upload_to_cloudinary(image_url, comic_id, chapter_num):
+    try:
+        return _upload_image(image_url, comic_id, chapter_num)[0]
     except Exception as e:
         logging.error(f"Gagal upload gambar {image_url}: {e}")
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
         return image_url
 
-def push_to_github():
+def upload_chapter_images(image_urls, comic_id, chapter_num, workers=DEFAULT_UPLOAD_WORKERS):
+    """Upload gambar satu chapter pake worker pool terbatas.
+
+    Urutan halaman tetap sama kayak image_urls. Balikin (images, failures),
+    failures berisi (nomor halaman, url sumber, error) buat halaman yang gagal;
+    halaman itu tetap pake URL sumber biar chapter masih bisa dibaca.
+    """
+    images = list(image_urls)
+    failures = []
+    if not images:
+        return images, failures
+    started = time.monotonic()
+    origins = {"upload": 0, "cache": 0, "dedupe": 0}
+    workers = max(1, min(workers, len(images)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_upload_image, url, comic_id, chapter_num) for url in images]
+        for page, (url, future) in enumerate(zip(image_urls, futures), start=1):
+            try:
+                images[page - 1], origin = future.result()
+                origins[origin] += 1
+            except Exception as e:
+                logging.error(f"Chapter {chapter_num} halaman {page} gagal upload ({url}): {e}")
+                failures.append((page, url, str(e)))
+    # Satu baris ringkasan per chapter, log per halaman disampling
+    logging.info(
+        f"Komik {comic_id} chapter {chapter_num}: {len(images)} halaman dalam {time.monotonic() - started:.1f}s "
+        f"({origins['upload']} diupload, {origins['cache']} dari cache, {origins['dedupe']} isi kembar, {len(failures)} gagal)"
+    )
+    return images, failures
+
+def push_to_github(now=False):
+    """Publish artefak frontend, lalu commit + push file data yang berubah (lihat git_publish)."""
     logging.info("Push perubahan ke GitHub...")
+    with metrics.timer("push"):
+        return _push_to_github(now)
+
+def _push_to_github(now):
     try:
-        subprocess.run(["git", "add", "."], check=True)
-        status = subprocess.run(["git", "status", "--porcelain"], capture_output=True, text=True)
-        if not status.stdout.strip():
-            logging.info("Tidak ada perubahan. Skip push.")
-            return True
-        subprocess.run(["git", "commit", "-m", "Update comic data"], check=True)
-        subprocess.run(
-            ["git", "push", f"https://{GITHUB_TOKEN}@github.com/{GITHUB_REPO}.git", "main"],
-            check=True
-        )
-        logging.info("Berhasil push ke GitHub.")
-        return True
+        import git_publish
+        from publish import publish_all
+        publish_all()
+        current = settings()
+        remote = current.GITHUB_REMOTE or f"https://github.com/{current.GITHUB_REPO}.git"
+        ok = git_publish.publish_changes(remote, current.GITHUB_TOKEN, current.GITHUB_BRANCH, current.PUSH_WINDOW, now)
+        if not ok:
+            metrics.inc_error("push")
+        return ok
     except Exception as e:
         logging.error(f"Error push: {e}")
+        metrics.inc_error("push")
         return False
 
 def get_comic_id_from_url(url):